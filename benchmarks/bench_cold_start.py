@@ -0,0 +1,118 @@
+"""Cold-start time, memory and docstore size of the job database, pickle vs mmap + SQLite.
+
+Builds synthetic databases of increasing size in a temporary directory, then
+opens each in a fresh process both ways (Linux, reads /proc/self/status):
+
+    python benchmarks/bench_cold_start.py --sizes 10000 100000 500000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+import faiss
+
+from chunk_store import CHUNKS_NAME, write_chunk_store
+from index_factory import save_config, make_config, write_index
+
+DIM = 384
+
+# Sentences job descriptions are assembled from, so chunks overlap the way store_jobs splits them
+SENTENCES = [
+    "Design and maintain Python services with Django and REST APIs.",
+    "Deploy to AWS using Docker, Kubernetes and Terraform.",
+    "Work with product managers to scope features and estimate effort.",
+    "Experience with PostgreSQL query tuning and data modelling.",
+    "Mentor junior engineers and review code across the team.",
+    "Build data pipelines with Airflow, Spark and Kafka.",
+    "Write automated tests and keep CI pipelines fast and reliable.",
+    "Monitor production systems with Prometheus and Grafana.",
+]
+
+def build_database(path, n_chunks, seed=0):
+    rng = np.random.default_rng(seed)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100)
+    docs, jobs = [], {}
+    while len(docs) < n_chunks:
+        job_id = f"job-{len(jobs)}"
+        text = " ".join(SENTENCES[i] for i in rng.integers(len(SENTENCES), size=40))
+        chunks = splitter.split_text(text)[:n_chunks - len(docs)]
+        ids = [str(uuid.uuid4()) for _ in chunks]
+        jobs[job_id] = {'filename': job_id + ".pdf", 'content_hash': None, 'ids': ids}
+        docs.extend(
+            Document(id=doc_id, page_content=chunk, metadata={'job_id': job_id, 'filename': job_id + ".pdf"})
+            for doc_id, chunk in zip(ids, chunks)
+        )
+
+    index = faiss.IndexFlatL2(DIM)
+    for start in range(0, n_chunks, 50_000):
+        index.add(rng.random((min(50_000, n_chunks - start), DIM), dtype=np.float32))
+    vectorstore = FAISS(FakeEmbeddings(size=DIM), index, InMemoryDocstore({doc.id: doc for doc in docs}), {})
+    vectorstore.index_to_docstore_id.update(enumerate(doc.id for doc in docs))
+
+    os.makedirs(path, exist_ok=True)
+    # Legacy layout: index.faiss + pickled docstore
+    vectorstore.save_local(path)
+    # Current layout: the same index.faiss + chunks.sqlite
+    write_index(path, index)
+    write_chunk_store(path, vectorstore, jobs)
+    save_config(path, make_config("flat"))
+
+def docstore_size(path, mode):
+    name = "index.pkl" if mode == "pickle" else CHUNKS_NAME
+    return os.path.getsize(os.path.join(path, name)) / 2 ** 20
+
+# Runs in a child process so every measurement starts cold
+CHILD = """
+import sys, time
+sys.path.insert(0, {root!r})
+from langchain_community.embeddings import FakeEmbeddings
+start = time.perf_counter()
+if {mode!r} == "pickle":
+    from langchain_community.vectorstores import FAISS
+    vs = FAISS.load_local({path!r}, FakeEmbeddings(size={dim}), allow_dangerous_deserialization=True)
+else:
+    from job_store import open_job_vectorstore
+    vs = open_job_vectorstore({path!r}, FakeEmbeddings(size={dim}))
+opened = time.perf_counter() - start
+vs.similarity_search_with_score_by_vector([0.5] * {dim}, k=3)
+first_query = time.perf_counter() - start - opened
+# Private memory is what each worker pays; file-backed pages are shared through the page cache
+status = dict(line.split(":", 1) for line in open("/proc/self/status"))
+print(opened, first_query, status["RssAnon"].split()[0], status["RssFile"].split()[0])
+"""
+
+def measure(path, mode):
+    code = CHILD.format(root=ROOT, mode=mode, path=path, dim=DIM)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    opened, first_query, anon_kb, file_kb = output.split()
+    return float(opened), float(first_query), int(anon_kb) / 1024, int(file_kb) / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'chunks':>9} {'format':>7} {'open s':>8} {'1st query s':>12} {'private MB':>11} {'shared MB':>10} {'docstore MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"db_{size}")
+            build_database(path, size)
+            for mode in ("pickle", "mmap"):
+                opened, first_query, private, shared = measure(path, mode)
+                print(f"{size:9d} {mode:>7} {opened:8.3f} {first_query:12.3f} {private:11.1f} {shared:10.1f} {docstore_size(path, mode):12.1f}")
+
+if __name__ == "__main__":
+    main()
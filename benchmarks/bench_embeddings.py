@@ -0,0 +1,111 @@
+"""Compare embedding backends for parity with fp32 torch and for CPU throughput.
+
+Embeds synthetic job description chunks with every backend in
+embedding_model.BACKENDS and reports, against the fp32 torch vectors:
+
+- cosine drift: mean and minimum cosine similarity of each chunk's vectors
+- top-1 agreement: how often a resume chunk's nearest job chunk is unchanged
+
+and chunks/sec for each backend, with texts batched in input order and in
+length order (matching.embed_texts):
+
+    python benchmarks/bench_embeddings.py --chunks 2000 --threads 4
+    python benchmarks/bench_embeddings.py --backends torch onnx-int8 --out bench_results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from embedding_model import BACKENDS, MODEL_NAME, cosine_drift, create_embeddings
+from matching import embed_texts
+from resume_matcher import RESUME_CHUNK_OVERLAP, RESUME_CHUNK_SIZE
+from synthetic_corpus import generate_job, generate_resume, job_text, resume_text
+
+def corpus_chunks(n_chunks, seed):
+    job_splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100)
+    resume_splitter = RecursiveCharacterTextSplitter(chunk_size=RESUME_CHUNK_SIZE, chunk_overlap=RESUME_CHUNK_OVERLAP)
+    job_chunks, resume_chunks = [], []
+    index = 0
+    while len(job_chunks) < n_chunks:
+        job_chunks.extend(job_splitter.split_text(job_text(generate_job(index, seed)[1])))
+        resume_chunks.extend(resume_splitter.split_text(resume_text(generate_resume(index, seed)[1])))
+        index += 1
+    return job_chunks[:n_chunks], resume_chunks[:max(n_chunks // 4, 1)]
+
+def throughput(embeddings, texts, batch_size, sort_by_length, repeats):
+    # Best of several runs, after one warm-up call
+    embeddings.embed_documents(texts[:batch_size])
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embed_texts(embeddings, texts, batch_size, sort_by_length=sort_by_length)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+def top1(job_vectors, resume_vectors):
+    job_vectors = job_vectors / np.linalg.norm(job_vectors, axis=1, keepdims=True)
+    resume_vectors = resume_vectors / np.linalg.norm(resume_vectors, axis=1, keepdims=True)
+    return np.argmax(resume_vectors @ job_vectors.T, axis=1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--chunks", type=int, default=1000, help="job chunks embedded per run")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0, help="inference threads (0: runtime default)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON lines file results are appended to")
+    args = parser.parse_args()
+
+    job_chunks, resume_chunks = corpus_chunks(args.chunks, args.seed)
+    print(f"{len(job_chunks)} job chunks, {len(resume_chunks)} resume chunks, "
+          f"{np.mean([len(chunk) for chunk in job_chunks]):.0f} chars on average")
+
+    # Everything is compared with the fp32 torch vectors the job database was built from
+    reference = create_embeddings(args.model, "torch", args.threads)
+    reference_jobs = embed_texts(reference, job_chunks, args.batch_size)
+    reference_top1 = top1(reference_jobs, embed_texts(reference, resume_chunks, args.batch_size))
+
+    results = []
+    print(f"{'backend':>11} {'mean cos':>9} {'min cos':>9} {'top-1':>7} {'chunks/s':>9} {'sorted':>9} {'load s':>7}")
+    for backend in args.backends:
+        start = time.perf_counter()
+        embeddings = reference if backend == "torch" else create_embeddings(args.model, backend, args.threads)
+        load_seconds = time.perf_counter() - start
+
+        job_vectors = embed_texts(embeddings, job_chunks, args.batch_size)
+        cosines = cosine_drift(reference_jobs, job_vectors)
+        agreement = float(np.mean(top1(job_vectors, embed_texts(embeddings, resume_chunks, args.batch_size)) == reference_top1))
+        result = {
+            'backend': backend,
+            'model': args.model,
+            'threads': args.threads,
+            'chunks': len(job_chunks),
+            'load_seconds': load_seconds,
+            'mean_cosine': float(cosines.mean()),
+            'min_cosine': float(cosines.min()),
+            'top1_agreement': agreement,
+            'chunks_per_sec': throughput(embeddings, job_chunks, args.batch_size, False, args.repeats),
+            'chunks_per_sec_sorted': throughput(embeddings, job_chunks, args.batch_size, True, args.repeats),
+        }
+        results.append(result)
+        print(f"{backend:>11} {result['mean_cosine']:9.5f} {result['min_cosine']:9.5f} {agreement:7.1%} "
+              f"{result['chunks_per_sec']:9.1f} {result['chunks_per_sec_sorted']:9.1f} {load_seconds:7.1f}")
+
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as out:
+            for result in results:
+                out.write(json.dumps(dict(result, timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"))) + "\n")
+        print(f"\nAppended {len(results)} results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Microbenchmark highlight_matching_words on chunk pairs from the sample PDFs.
+
+Run from the repository root:
+
+    python benchmarks/bench_highlighting.py --repeat 3
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from highlighting import highlight_matching_words
+from pdf_extraction import extract_text_from_bytes
+
+# The implementation highlight_matching_words replaced: one re.sub per word and phrase
+def legacy_highlight_matching_words(text1, text2):
+    text1_lower = text1.lower()
+    text2_lower = text2.lower()
+    words1 = set(re.findall(r'\b\w{4,}\b', text1_lower))
+    words2 = set(re.findall(r'\b\w{4,}\b', text2_lower))
+    common_words = words1.intersection(words2)
+    matcher = SequenceMatcher(None, text1_lower, text2_lower)
+    common_phrases = []
+    for match in matcher.get_matching_blocks():
+        if match.size > 10:
+            common_phrases.append(text1[match.a:match.a + match.size])
+    highlighted_text1 = text1
+    highlighted_text2 = text2
+    for word in common_words:
+        pattern = re.compile(re.escape(word), re.IGNORECASE)
+        highlighted_text1 = pattern.sub(f"**{word}**", highlighted_text1)
+        highlighted_text2 = pattern.sub(f"**{word}**", highlighted_text2)
+    for phrase in common_phrases:
+        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
+        highlighted_text1 = pattern.sub(f"<mark>{phrase}</mark>", highlighted_text1)
+        highlighted_text2 = pattern.sub(f"<mark>{phrase}</mark>", highlighted_text2)
+    return highlighted_text1, highlighted_text2, common_words, common_phrases
+
+def read_pdf(path):
+    with open(path, "rb") as f:
+        return extract_text_from_bytes(f.read())
+
+def time_pairs(function, pairs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for job_chunk, resume_chunk in pairs:
+            function(job_chunk, resume_chunk)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", default="resumes")
+    parser.add_argument("--job", default="SDE_AI_Python_Job_Description.pdf")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Same chunking as store_jobs (job descriptions) and search_resumes (resumes)
+    job_chunks = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100).split_text(read_pdf(args.job))
+    resume_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    resume_chunks = []
+    for path in sorted(glob.glob(os.path.join(args.resumes, "*.pdf"))):
+        resume_chunks.extend(resume_splitter.split_text(read_pdf(path)))
+    pairs = [(job_chunk, resume_chunk) for job_chunk in job_chunks for resume_chunk in resume_chunks]
+
+    # Whole documents as one pair stress the phrase matcher on longer inputs
+    whole_pairs = [(" ".join(job_chunks), " ".join(resume_chunks))]
+
+    print(f"{len(pairs)} chunk pairs")
+    for label, batch in (("chunk pairs", pairs), ("whole texts", whole_pairs)):
+        legacy = time_pairs(legacy_highlight_matching_words, batch, args.repeat)
+        current = time_pairs(highlight_matching_words, batch, args.repeat)
+        print(f"{label:12} legacy: {len(batch) / legacy:10.1f} pairs/sec  "
+              f"single-pass: {len(batch) / current:10.1f} pairs/sec  speedup: {legacy / current:6.2f}x")
+
+if __name__ == "__main__":
+    main()
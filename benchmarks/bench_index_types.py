@@ -0,0 +1,79 @@
+"""Recall and latency of each index type in index_factory against the flat baseline.
+
+Uses clustered random vectors shaped like MiniLM embeddings, so it needs no
+model and scales to corpus sizes the sample job database cannot reach:
+
+    python benchmarks/bench_index_types.py --vectors 100000 --queries 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_factory import INDEX_TYPES, apply_search_params, build_index, make_config
+
+def clustered_vectors(rng, n, dim, centers):
+    # Job description chunks cluster by role, so uniform noise would flatter IVF
+    labels = rng.integers(0, len(centers), n)
+    vectors = centers[labels] + rng.normal(scale=0.35, size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def recall_at_k(expected, actual):
+    hits = sum(len(set(e) & set(a)) for e, a in zip(expected, actual))
+    return hits / expected.size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(200, args.dim))
+    corpus = clustered_vectors(rng, args.vectors, args.dim, centers)
+    queries = clustered_vectors(rng, args.queries, args.dim, centers)
+
+    results = []
+    expected = None
+    for index_type in INDEX_TYPES:
+        config = make_config(index_type)
+        start = time.perf_counter()
+        index = build_index(config, corpus)
+        index.add(corpus)
+        build_time = time.perf_counter() - start
+
+        if index_type == "flat":
+            settings = [{}]
+        elif index_type == "hnsw":
+            settings = [{'ef_search': ef} for ef in args.ef_search]
+        else:
+            settings = [{'nprobe': nprobe} for nprobe in args.nprobe]
+
+        for setting in settings:
+            apply_search_params(index, config, **setting)
+            start = time.perf_counter()
+            _, indices = index.search(queries, args.k)
+            search_time = time.perf_counter() - start
+            if expected is None:
+                expected = indices
+            label = index_type + "".join(f" {key}={value}" for key, value in setting.items())
+            results.append((label, build_time, search_time, recall_at_k(expected, indices),
+                            faiss.serialize_index(index).nbytes))
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"{'index':24} {'build s':>9} {'us/query':>10} {'recall@k':>9} {'size MB':>9}")
+    for label, build_time, search_time, recall, size in results:
+        print(f"{label:24} {build_time:9.2f} {search_time / args.queries * 1e6:10.1f} {recall:9.3f} {size / 1e6:9.1f}")
+
+if __name__ == "__main__":
+    main()
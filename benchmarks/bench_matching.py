@@ -0,0 +1,92 @@
+"""Compare per-chunk similarity_search_with_score against the batched matcher.
+
+Run from the repository root:
+
+    python benchmarks/bench_matching.py --copies 100
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from job_store import open_job_vectorstore
+from matching import match_resume_chunks
+
+# The matching loop search_resumes.main used before batching
+def match_per_chunk(vectorstore, chunk_lists, k=3):
+    results = []
+    for chunks in chunk_lists:
+        resume_matches = []
+        for chunk in chunks:
+            for match, score in vectorstore.similarity_search_with_score(chunk, k=k):
+                resume_matches.append({
+                    'resume_chunk': chunk,
+                    'job_chunk': match.page_content,
+                    'job_id': match.metadata['job_id'],
+                    'filename': match.metadata['filename'],
+                    'similarity': 1.0 / (1.0 + float(score))
+                })
+        results.append(resume_matches)
+    return results
+
+def same_records(expected, actual, tolerance=1e-4):
+    for expected_matches, actual_matches in zip(expected, actual):
+        if len(expected_matches) != len(actual_matches):
+            return False
+        for a, b in zip(expected_matches, actual_matches):
+            if (a['resume_chunk'], a['job_chunk'], a['job_id'], a['filename']) != \
+                    (b['resume_chunk'], b['job_chunk'], b['job_id'], b['filename']):
+                return False
+            if abs(a['similarity'] - b['similarity']) > tolerance:
+                return False
+    return len(expected) == len(actual)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="job_database")
+    parser.add_argument("--resumes", default="resumes")
+    parser.add_argument("--copies", type=int, default=50, help="times to repeat the sample resumes")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="use deterministic fake embeddings instead of MiniLM (smoke test only)")
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    vectorstore = open_job_vectorstore(args.db, embeddings)
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    chunk_lists = []
+    for path in sorted(glob.glob(os.path.join(args.resumes, "*.pdf"))):
+        text = " ".join(doc.page_content for doc in PyPDFLoader(path).load())
+        chunk_lists.append(text_splitter.split_text(text))
+    chunk_lists = chunk_lists * args.copies
+    total_chunks = sum(len(chunks) for chunks in chunk_lists)
+    print(f"{len(chunk_lists)} resumes, {total_chunks} chunks, {vectorstore.index.ntotal} job chunks")
+
+    start = time.perf_counter()
+    expected = match_per_chunk(vectorstore, chunk_lists, k=args.k)
+    per_chunk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = match_resume_chunks(vectorstore, embeddings, chunk_lists, k=args.k, batch_size=args.batch_size)
+    batched_time = time.perf_counter() - start
+
+    print(f"per-chunk: {per_chunk_time:8.3f}s  {total_chunks / per_chunk_time:10.1f} chunks/sec")
+    print(f"batched:   {batched_time:8.3f}s  {total_chunks / batched_time:10.1f} chunks/sec")
+    print(f"speedup:   {per_chunk_time / batched_time:8.2f}x")
+    print(f"identical records: {same_records(expected, actual)}")
+
+if __name__ == "__main__":
+    main()
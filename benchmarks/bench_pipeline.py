@@ -0,0 +1,219 @@
+"""Time every stage of the pipeline end to end on a synthetic corpus.
+
+For each scale N, generates N resumes and N job descriptions (see
+synthetic_corpus.py), then times PDF extraction, chunking, embedding, index
+build/save/open, search, scoring, match records, highlighting and results. Each scale
+appends one JSON line to --out, so runs can be compared across commits:
+
+    python benchmarks/bench_pipeline.py --scales 10 1000 100000 --fake-embeddings
+
+Writing and parsing 100k PDFs takes hours, so at most --pdf-limit documents
+of each kind go through PDF generation and extraction; the rest enter the
+pipeline as the same template text directly.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import faiss
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from index_factory import INDEX_TYPES, build_index, make_config
+from job_store import JobDatabase, open_job_vectorstore
+from matching import build_match_records, embed_texts, search_vectors
+from highlighting import highlight_matching_words
+from pdf_extraction import iter_extracted_texts
+from resume_matcher import (BEST_JOBS, MATCHES_PER_CHUNK, RESUME_BATCH_SIZE, RESUME_CHUNK_OVERLAP, RESUME_CHUNK_SIZE,
+                            TOP_MATCHES, build_resume_result)
+from scoring import ScoreMatrix, job_index
+from synthetic_corpus import generate_job, generate_resume, job_text, resume_text, write_corpus
+
+class StageTimer:
+    """Wall and CPU time per named stage, with throughput when an item count is known."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, items=None):
+        record = {'items': items}
+        wall, cpu = time.perf_counter(), time.process_time()
+        yield record
+        record['seconds'] = time.perf_counter() - wall
+        # Only this process: PDF extraction work done in worker processes is not included
+        record['cpu_seconds'] = time.process_time() - cpu
+        if record['items'] is not None and record['seconds'] > 0:
+            record['items_per_sec'] = record['items'] / record['seconds']
+        self.stages[name] = record
+
+def environment(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'faiss': faiss.__version__,
+        'embeddings': "fake" if args.fake_embeddings else args.model,
+        'index_type': args.index_type,
+    }
+
+def extract(paths, workers):
+    uploads = ((os.path.basename(path), open(path, "rb").read()) for path in paths)
+    texts = {}
+    for filename, text, error in iter_extracted_texts(uploads, max_workers=workers):
+        if error:
+            raise RuntimeError(f"{filename}: {error}")
+        texts[filename] = text
+    # Back in generation order, whatever order the workers finished in
+    return [texts[os.path.basename(path)] for path in paths]
+
+def run_scale(n, args, embeddings, tmp):
+    timer = StageTimer()
+    n_pdfs = min(n, args.pdf_limit)
+    corpus_dir = os.path.join(tmp, f"corpus_{n}")
+
+    with timer.stage("generate_pdfs", 2 * n_pdfs):
+        resume_paths, job_paths = write_corpus(corpus_dir, n_pdfs, n_pdfs, args.seed)
+    with timer.stage("extract", 2 * n_pdfs):
+        resume_texts = extract(resume_paths, args.workers)
+        job_texts = extract(job_paths, args.workers)
+    resume_texts += [resume_text(generate_resume(i, args.seed)[1]) for i in range(n_pdfs, n)]
+    job_texts += [job_text(generate_job(i, args.seed)[1]) for i in range(n_pdfs, n)]
+    resume_names = [generate_resume(i, args.seed)[0] for i in range(n)]
+    job_ids = [os.path.splitext(generate_job(i, args.seed)[0])[0] for i in range(n)]
+
+    with timer.stage("chunk", 2 * n):
+        job_splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=100)
+        resume_splitter = RecursiveCharacterTextSplitter(chunk_size=RESUME_CHUNK_SIZE, chunk_overlap=RESUME_CHUNK_OVERLAP)
+        job_chunks = [job_splitter.split_text(text) for text in job_texts]
+        chunk_lists = [resume_splitter.split_text(text) for text in resume_texts]
+    all_job_chunks = [chunk for chunks in job_chunks for chunk in chunks]
+    all_resume_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+
+    with timer.stage("embed_jobs", len(all_job_chunks)):
+        job_vectors = embed_texts(embeddings, all_job_chunks, args.batch_size)
+
+    with timer.stage("index_build", len(all_job_chunks)):
+        config = make_config(args.index_type)
+        vectorstore = FAISS(embeddings, build_index(config, job_vectors), InMemoryDocstore(), {})
+        jobs, ids, metadatas = {}, [], []
+        for job_id, chunks in zip(job_ids, job_chunks):
+            chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+            jobs[job_id] = {'filename': job_id + ".pdf", 'content_hash': None, 'ids': chunk_ids}
+            ids.extend(chunk_ids)
+            metadatas.extend({'job_id': job_id, 'filename': job_id + ".pdf"} for _ in chunks)
+        vectorstore.add_embeddings(zip(all_job_chunks, job_vectors), metadatas=metadatas, ids=ids)
+
+    db_path = os.path.join(tmp, f"db_{n}")
+    with timer.stage("index_save", len(all_job_chunks)):
+        JobDatabase(db_path, embeddings, vectorstore, jobs, config).save()
+    with timer.stage("index_open"):
+        vectorstore = open_job_vectorstore(db_path, embeddings)
+
+    with timer.stage("embed_resumes", len(all_resume_chunks)):
+        resume_vectors = embed_texts(embeddings, all_resume_chunks, args.batch_size)
+    with timer.stage("search", len(all_resume_chunks)):
+        distances, indices = search_vectors(vectorstore, resume_vectors, MATCHES_PER_CHUNK)
+
+    # Scored a batch of resumes at a time, as ResumeMatcher.iter_results does; a single
+    # resume x job matrix at 100k x 100k would not fit in memory
+    with timer.stage("score", n):
+        chunk_owner = np.repeat(np.arange(n), [len(chunks) for chunks in chunk_lists])
+        offsets = np.r_[0, np.cumsum([len(chunks) for chunks in chunk_lists])]
+        index_job_ids, row_to_job = job_index(vectorstore)
+        best_jobs = []
+        for start in range(0, n, RESUME_BATCH_SIZE):
+            stop = min(start + RESUME_BATCH_SIZE, n)
+            rows = slice(offsets[start], offsets[stop])
+            score_table = ScoreMatrix.from_search(
+                resume_names[start:stop], index_job_ids, row_to_job, chunk_owner[rows] - start,
+                distances[rows], indices[rows], top_k=MATCHES_PER_CHUNK
+            )
+            best_jobs.extend(score_table.ranked_jobs(limit=BEST_JOBS))
+    with timer.stage("match_records", n):
+        all_matches = build_match_records(vectorstore, chunk_lists, distances, indices)
+    # The top matches of every resume, as build_resume_result highlights them. Timed whatever
+    # their similarity, since fake embeddings never clear MIN_SIMILARITY.
+    top_matches = [
+        sorted(resume_matches, key=lambda match: match['similarity'], reverse=True)[:TOP_MATCHES]
+        for resume_matches in all_matches
+    ]
+    with timer.stage("highlight", sum(len(matches) for matches in top_matches)):
+        for matches in top_matches:
+            for match in matches:
+                highlight_matching_words(match['job_chunk'], match['resume_chunk'])
+    with timer.stage("results", n):
+        for resume_name, resume_matches, resume_jobs in zip(resume_names, all_matches, best_jobs):
+            build_resume_result(resume_name, resume_matches, resume_jobs)
+
+    return {
+        'scale': n,
+        'documents': {
+            'resumes': n,
+            'jobs': n,
+            'pdfs': 2 * n_pdfs,
+            'job_chunks': len(all_job_chunks),
+            'resume_chunks': len(all_resume_chunks),
+        },
+        'total_seconds': sum(record['seconds'] for record in timer.stages.values()),
+        'stages': timer.stages,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--pdf-limit", type=int, default=1000, help="most documents of each kind rendered as PDFs")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="use deterministic fake embeddings instead of the model (no torch needed)")
+    parser.add_argument("--out", default="bench_results.jsonl", help="JSON lines file results are appended to")
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=384)
+    else:
+        # The raw model, not the cached one, so repeated runs measure the same work
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=args.model)
+
+    env = environment(args)
+    with tempfile.TemporaryDirectory() as tmp, open(args.out, "a", encoding="utf-8") as out:
+        for n in args.scales:
+            result = dict(env, **run_scale(n, args, embeddings, tmp))
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+            print(f"\nscale {n}: {result['documents']['job_chunks']} job chunks, "
+                  f"{result['documents']['resume_chunks']} resume chunks, {result['total_seconds']:.2f}s total")
+            print(f"{'stage':>14} {'seconds':>9} {'cpu s':>9} {'items/s':>11}")
+            for name, record in result['stages'].items():
+                rate = f"{record['items_per_sec']:11.1f}" if 'items_per_sec' in record else f"{'':>11}"
+                print(f"{name:>14} {record['seconds']:9.3f} {record['cpu_seconds']:9.3f} {rate}")
+    print(f"\nAppended {len(args.scales)} results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Query throughput of a sharded job index against a single index, by shard count.
+
+Writes clustered random vectors shaped like MiniLM embeddings into a temporary
+database once per shard count (split by row, as job_id hashing would), then
+searches each through sharding.ShardedIndex with one worker process per shard
+and checks the merged top-k against the single index:
+
+    python benchmarks/bench_shards.py --vectors 500000 --shards 1 2 4 8 --index-type flat
+
+Scaling needs at least as many free cores as shards; each worker gets an even
+share of the cores for its FAISS threads.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_index_types import clustered_vectors, recall_at_k
+from index_factory import apply_search_params, build_index, make_config, save_config, write_index
+from sharding import ShardedIndex, shard_paths
+
+def write_shards(path, config, corpus, n_shards):
+    for shard, shard_path in enumerate(shard_paths(path, n_shards)):
+        os.makedirs(shard_path)
+        vectors = corpus[shard::n_shards]
+        index = build_index(config, vectors)
+        index.add(vectors)
+        save_config(shard_path, config)
+        write_index(shard_path, index)
+    # Global row of each shard row, to compare against the single index
+    return np.concatenate([np.arange(shard, len(corpus), n_shards) for shard in range(n_shards)])
+
+def queries_per_second(search, queries, batch_size, repeat):
+    search(queries[:batch_size])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for begin in range(0, len(queries), batch_size):
+            search(queries[begin:begin + batch_size])
+    return repeat * len(queries) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=256, help="queries per search call (one resume batch)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(200, args.dim))
+    corpus = clustered_vectors(rng, args.vectors, args.dim, centers)
+    queries = clustered_vectors(rng, args.queries, args.dim, centers)
+    config = make_config(args.index_type)
+
+    index = build_index(config, corpus)
+    index.add(corpus)
+    apply_search_params(index, config)
+    _, expected = index.search(queries, args.k)
+    baseline = queries_per_second(lambda batch: index.search(batch, args.k), queries, args.batch_size, args.repeat)
+
+    cores = os.cpu_count() or 1
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.index_type}, {args.queries} queries "
+          f"in batches of {args.batch_size}, k={args.k}, {cores} cores")
+    print(f"{'layout':18} {'queries/s':>10} {'speedup':>8} {'recall@k':>9}")
+    print(f"{'single index':18} {baseline:10.0f} {1.0:8.2f} {1.0:9.3f}")
+    for n_shards in args.shards:
+        with tempfile.TemporaryDirectory() as path:
+            global_rows = write_shards(path, config, corpus, n_shards)
+            sharded = ShardedIndex(shard_paths(path, n_shards), threads=max(1, cores // n_shards))
+            try:
+                _, indices = sharded.search(queries, args.k)
+                qps = queries_per_second(lambda batch: sharded.search(batch, args.k), queries, args.batch_size,
+                                         args.repeat)
+            finally:
+                sharded.close()
+        recall = recall_at_k(expected, np.where(indices >= 0, global_rows[indices], -1))
+        print(f"{f'{n_shards} shards':18} {qps:10.0f} {qps / baseline:8.2f} {recall:9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Load-test the match service with many concurrent clients.
+
+Starts the service in-process on a free port (or targets --url), then runs
+--clients threads that each send --requests single-resume requests over HTTP:
+
+    python benchmarks/load_test_service.py --clients 16 --requests 20
+    python benchmarks/load_test_service.py --clients 16 --compare
+    python benchmarks/load_test_service.py --url http://127.0.0.1:8765
+
+--compare runs the same load with batching off (--max-batch 1) for reference.
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+
+from match_service import MAX_QUEUE, MAX_WAIT, MatchClient, MatchService, ServiceBusy, ServiceThread, make_server
+from pdf_extraction import iter_extracted_texts
+from resume_matcher import RESUME_BATCH_SIZE
+
+class SimulatedModel(Embeddings):
+    """Deterministic fake vectors that take as long as a model call would.
+
+    call_ms is paid once per embed call and text_ms once per text, which is the
+    per-call overhead batching is meant to amortize.
+    """
+
+    def __init__(self, call_ms, text_ms, size=384):
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        self.fake = DeterministicFakeEmbedding(size=size)
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+
+    def embed_documents(self, texts):
+        time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return self.fake.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def load_resume_texts(directory):
+    uploads = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.pdf"))):
+        with open(path, "rb") as f:
+            uploads.append((os.path.basename(path), f.read()))
+    return [(name, text) for name, text, error in iter_extracted_texts(uploads) if text]
+
+def run_clients(url, resumes, clients, requests):
+    latencies = []
+    busy = [0]
+    lock = threading.Lock()
+
+    def client_loop(client_number):
+        client = MatchClient(url)
+        for i in range(requests):
+            name, text = resumes[(client_number + i) % len(resumes)]
+            while True:
+                start = time.perf_counter()
+                try:
+                    client.match_many([name], [text])
+                except ServiceBusy:
+                    with lock:
+                        busy[0] += 1
+                    time.sleep(0.05)
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+                break
+
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.array(latencies), busy[0]
+
+def report(label, elapsed, latencies, busy, stats):
+    p50, p99 = np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+    print(f"{label:>10} {len(latencies) / elapsed:9.1f} {p50:9.1f} {p99:9.1f} {busy:6d} "
+          f"{stats['mean_batch_size']:7.1f} {stats['p50_ms'] or 0:9.1f} {stats['p99_ms'] or 0:9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="test a running service instead of starting one")
+    parser.add_argument("--db", default="job_database")
+    parser.add_argument("--resumes", default="resumes")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10, help="requests sent by each client")
+    parser.add_argument("--max-batch", type=int, default=RESUME_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    parser.add_argument("--compare", action="store_true", help="also run with batching off")
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="use a simulated model instead of MiniLM (no torch needed)")
+    parser.add_argument("--fake-call-ms", type=float, default=20.0, help="simulated cost of one model call")
+    parser.add_argument("--fake-text-ms", type=float, default=1.0, help="simulated cost of each text in a call")
+    args = parser.parse_args()
+
+    resumes = load_resume_texts(args.resumes)
+    print(f"{args.clients} clients x {args.requests} requests, {len(resumes)} distinct resumes")
+    print(f"{'batching':>10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'503s':>6} "
+          f"{'batch':>7} {'svc p50':>9} {'svc p99':>9}")
+
+    if args.url:
+        elapsed, latencies, busy = run_clients(args.url, resumes, args.clients, args.requests)
+        report("remote", elapsed, latencies, busy, MatchClient(args.url).stats())
+        return
+
+    if args.fake_embeddings:
+        embeddings = SimulatedModel(args.fake_call_ms, args.fake_text_ms)
+    else:
+        from embedding_model import load_embedding_model
+        embeddings = load_embedding_model()
+
+    runs = [("on", args.max_batch)]
+    if args.compare:
+        runs.append(("off", 1))
+    for label, max_batch in runs:
+        service = MatchService(args.db, embeddings, max_batch, args.max_wait_ms / 1000, args.max_queue)
+        service_thread = ServiceThread(service)
+        server = make_server(service_thread, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            # Open the database before timing anything
+            service_thread.index_config()
+            elapsed, latencies, busy = run_clients(url, resumes, args.clients, args.requests)
+            report(label, elapsed, latencies, busy, service.stats())
+        finally:
+            server.shutdown()
+            server.server_close()
+            service_thread.close()
+
+if __name__ == "__main__":
+    main()
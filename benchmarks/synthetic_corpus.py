@@ -0,0 +1,215 @@
+"""Generate synthetic resumes and job descriptions from parameterized templates.
+
+Documents are built from role templates with a seeded RNG, so the same
+(seed, index) always gives the same document. PDFs are rendered across a
+process pool by resume_creater.iter_create_pdfs:
+
+    python benchmarks/synthetic_corpus.py --resumes 1000 --jobs 1000 --out corpus
+
+--jsonl writes the records instead, for streaming into resume_creater.py:
+
+    python benchmarks/synthetic_corpus.py --resumes 100000 --jobs 0 --jsonl --out corpus
+    python resume_creater.py --records corpus/resumes.jsonl --out corpus/resumes
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_creater import iter_create_pdfs
+
+ROLES = {
+    "Python Developer": {
+        'skills': ["Python", "Django", "Flask", "FastAPI", "SQLAlchemy", "Celery", "PostgreSQL", "Redis", "REST APIs", "pytest"],
+        'tasks': [
+            "Designed and deployed REST APIs in {skill} used by {count}+ daily users",
+            "Automated data pipelines with {skill}, saving {count}+ hours of manual work",
+            "Migrated services to {skill} and cut response times by {percent}%",
+            "Wrote unit tests with {skill} and raised coverage by {percent}%",
+        ],
+    },
+    "C++ Engineer": {
+        'skills': ["C++", "STL", "Boost", "CMake", "GDB", "Valgrind", "Multithreading", "Linux", "Networking", "Low latency"],
+        'tasks': [
+            "Developed {skill} modules for trading systems with sub-millisecond latency",
+            "Optimized a legacy {skill} codebase, improving throughput by {percent}%",
+            "Implemented {skill} services handling {count}+ requests per second",
+            "Profiled memory usage with {skill} and removed {count} leaks",
+        ],
+    },
+    "Machine Learning Engineer": {
+        'skills': ["Python", "PyTorch", "TensorFlow", "Scikit-learn", "NLP", "Computer Vision", "MLflow", "SageMaker", "Pandas", "Docker"],
+        'tasks': [
+            "Trained {skill} models that improved prediction accuracy by {percent}%",
+            "Deployed {skill} models behind APIs serving {count}+ daily requests",
+            "Built {skill} pipelines for experiment tracking and model versioning",
+            "Designed an anomaly detection system with {skill} saving ${count}k annually",
+        ],
+    },
+    "Data Engineer": {
+        'skills': ["Python", "SQL", "Spark", "Kafka", "Airflow", "dbt", "Snowflake", "AWS", "Terraform", "Data modelling"],
+        'tasks': [
+            "Built {skill} pipelines processing {count}+ million events per day",
+            "Reduced warehouse costs by {percent}% by restructuring {skill} jobs",
+            "Orchestrated {count} daily batch jobs with {skill}",
+            "Introduced {skill} data quality checks catching {percent}% of bad loads",
+        ],
+    },
+    "Frontend Developer": {
+        'skills': ["JavaScript", "TypeScript", "React", "Redux", "Next.js", "CSS", "Webpack", "Jest", "Accessibility", "GraphQL"],
+        'tasks': [
+            "Rebuilt the checkout flow in {skill}, lifting conversion by {percent}%",
+            "Shipped a {skill} component library used across {count} products",
+            "Cut bundle size by {percent}% by reworking the {skill} build",
+            "Added {skill} tests covering {count}+ user journeys",
+        ],
+    },
+    "DevOps Engineer": {
+        'skills': ["AWS", "Kubernetes", "Docker", "Terraform", "Ansible", "Prometheus", "Grafana", "CI/CD", "Linux", "Bash"],
+        'tasks': [
+            "Migrated {count}+ services to {skill}, reducing deploy time by {percent}%",
+            "Automated infrastructure with {skill} across {count} environments",
+            "Set up {skill} monitoring and cut incident response time by {percent}%",
+            "Maintained {skill} pipelines running {count}+ builds a day",
+        ],
+    },
+}
+
+FIRST_NAMES = ["Aarav", "Priya", "John", "Jane", "Rahul", "Ananya", "Wei", "Maria", "Omar", "Sara", "Liam", "Fatima"]
+LAST_NAMES = ["Sharma", "Doe", "Smith", "Verma", "Chen", "Garcia", "Khan", "Nair", "Brown", "Ali", "Patel", "Kim"]
+COMPANIES = ["ABC Tech", "XYZ Corp", "Innovatech", "DataWorks", "AI Labs", "Tech Systems", "CloudNine", "ByteForge"]
+LOCATIONS = ["Pune (Hybrid)", "Bengaluru", "Remote", "Hyderabad (On-site)", "Chennai (Hybrid)"]
+DEGREES = ["B.Tech in Computer Science", "B.E. in Computer Engineering", "M.Tech in Artificial Intelligence", "M.Sc. in Data Science"]
+
+def _task(rng, template, skills):
+    return template.format(skill=rng.choice(skills), count=rng.randint(2, 200), percent=rng.randint(10, 60)) + "."
+
+def generate_resume(index, seed=0):
+    """Resume data for resume_creater.create_resume_pdf; returns (filename, data)."""
+    rng = random.Random(f"resume-{seed}-{index}")
+    role = rng.choice(sorted(ROLES))
+    template = ROLES[role]
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    years = rng.randint(1, 12)
+    skills = rng.sample(template['skills'], 8)
+    data = {
+        "name": name,
+        "contact": f"Email: candidate{index}@example.com | Phone: +91-9{rng.randint(100000000, 999999999)}",
+        "summary": f"{role} with {years}+ years of experience in {', '.join(skills[:3])}. "
+                   f"Focused on reliable, well-tested software and clear communication with the team.",
+        "skills": [
+            f"Core: {', '.join(skills[:4])}",
+            f"Tools: {', '.join(skills[4:])}",
+            f"Other: {', '.join(rng.sample(ROLES[rng.choice(sorted(ROLES))]['skills'], 3))}",
+        ],
+        "experience": [
+            {
+                "title": f"{role} | {company} | {2024 - offset} – {'Present' if n == 0 else 2024 - offset + 2}",
+                "details": [_task(rng, task, skills) for task in rng.sample(template['tasks'], 3)]
+            }
+            for n, (company, offset) in enumerate(zip(rng.sample(COMPANIES, 2), (2, 5)))
+        ],
+        "projects": [
+            f"{rng.choice(skills)} project: {_task(rng, rng.choice(template['tasks']), skills)}"
+            for _ in range(2)
+        ],
+        "education": f"{rng.choice(DEGREES)}, {rng.choice(['ABC University', 'XYZ Institute', 'NIT', 'IIT'])}, {2024 - years - 1}",
+    }
+    return f"Synthetic_Resume_{index:06d}.pdf", data
+
+def generate_job(index, seed=0):
+    """Job description data for resume_creater.create_job_description_pdf; returns (filename, data)."""
+    rng = random.Random(f"job-{seed}-{index}")
+    role = rng.choice(sorted(ROLES))
+    template = ROLES[role]
+    company = rng.choice(COMPANIES)
+    skills = rng.sample(template['skills'], 7)
+    low = rng.randint(0, 6)
+    data = {
+        "title": f"{role} – {skills[0]}",
+        "company": f"{company} Pvt. Ltd.",
+        "about": f"{company} builds software products used by teams around the world. "
+                 f"We are looking for engineers who enjoy working with {skills[1]} and {skills[2]}.",
+        "overview": f"As a {role} you will design, build and operate systems using {', '.join(skills[:3])}, "
+                    f"working closely with product and engineering teams.",
+        "responsibilities": [_task(rng, task, skills).rstrip(".") for task in rng.sample(template['tasks'], 3)] + [
+            f"Collaborate with cross-functional teams on {skills[3]} and {skills[4]}",
+            "Ensure high code quality, performance, and scalability",
+        ],
+        "requirements": [
+            f"Strong proficiency in {skills[0]} and {skills[1]}",
+            f"Hands-on experience with {', '.join(skills[2:5])}",
+            f"Familiarity with {skills[5]} and {skills[6]}",
+            "Strong problem-solving skills and willingness to learn",
+        ],
+        "location": rng.choice(LOCATIONS),
+        "experience": f"{low}–{low + rng.randint(2, 5)} years",
+    }
+    return f"Synthetic_JD_{index:06d}.pdf", data
+
+def resume_text(data):
+    """Plain text of a generated resume, for scales where writing every PDF is too slow."""
+    lines = [data["name"], data["contact"], "SUMMARY", data["summary"], "SKILLS"]
+    lines += [f"• {skill}" for skill in data["skills"]]
+    lines.append("EXPERIENCE")
+    for exp in data["experience"]:
+        lines.append(exp["title"])
+        lines += [f"• {detail}" for detail in exp["details"]]
+    lines.append("PROJECTS")
+    lines += [f"• {project}" for project in data["projects"]]
+    lines += ["EDUCATION", data["education"]]
+    return "\n".join(lines)
+
+def job_text(data):
+    """Plain text of a generated job description."""
+    lines = [f"Job Title: {data['title']}", f"Company: {data['company']}", "About Us", data["about"],
+             "Role Overview", data["overview"], "Responsibilities"]
+    lines += [f"- {item}" for item in data["responsibilities"]]
+    lines.append("Requirements")
+    lines += [f"- {item}" for item in data["requirements"]]
+    lines += [f"Location: {data['location']}", f"Experience: {data['experience']}"]
+    return "\n".join(lines)
+
+def write_corpus(directory, n_resumes, n_jobs, seed=0, processes=None):
+    """Write PDFs to directory/resumes and directory/jobs; returns the two lists of paths."""
+    resume_paths = list(iter_create_pdfs((generate_resume(index, seed) for index in range(n_resumes)),
+                                         os.path.join(directory, "resumes"), "resume", processes))
+    job_paths = list(iter_create_pdfs((generate_job(index, seed) for index in range(n_jobs)),
+                                      os.path.join(directory, "jobs"), "job", processes))
+    return resume_paths, job_paths
+
+def write_records(directory, n_resumes, n_jobs, seed=0):
+    """Write the records as directory/resumes.jsonl and directory/jobs.jsonl for resume_creater.py --records."""
+    os.makedirs(directory, exist_ok=True)
+    for name, count, generate in (("resumes.jsonl", n_resumes, generate_resume), ("jobs.jsonl", n_jobs, generate_job)):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            for index in range(count):
+                filename, data = generate(index, seed)
+                f.write(json.dumps(dict(data, filename=filename), ensure_ascii=False) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic_corpus")
+    parser.add_argument("--processes", type=int, default=None, help="rendering processes (default: CPU count)")
+    parser.add_argument("--jsonl", action="store_true", help="write JSONL records instead of PDFs")
+    args = parser.parse_args()
+    if args.jsonl:
+        write_records(args.out, args.resumes, args.jobs, args.seed)
+        print(f"Wrote {args.resumes} resume and {args.jobs} job description records to {args.out}")
+        return
+    start = time.perf_counter()
+    resume_paths, job_paths = write_corpus(args.out, args.resumes, args.jobs, args.seed, args.processes)
+    elapsed = time.perf_counter() - start
+    documents = len(resume_paths) + len(job_paths)
+    print(f"Wrote {len(resume_paths)} resumes and {len(job_paths)} job descriptions to {args.out} "
+          f"({documents / elapsed if elapsed else 0.0:.1f} docs/sec)")
+
+if __name__ == "__main__":
+    main()
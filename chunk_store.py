@@ -0,0 +1,222 @@
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections.abc import Mapping
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+# Jobs and chunks, stored next to index.faiss in place of LangChain's index.pkl
+CHUNKS_NAME = "chunks.sqlite"
+
+# 1: one row per chunk with its own text and metadata
+# 2: a job table with one compressed text per job; chunks are (job, offset, length) into it
+SCHEMA_VERSION = 2
+
+# Shortest chunk overlap worth folding into the previous chunk's text
+_MIN_OVERLAP = 8
+
+def _pack_id(doc_id):
+    # Docstore ids are UUID strings; 16 raw bytes instead of 36 characters
+    return uuid.UUID(doc_id).bytes
+
+def _unpack_id(packed):
+    return str(uuid.UUID(bytes=packed))
+
+def _pack_text(text):
+    return zlib.compress(text.encode("utf-8"))
+
+def _unpack_text(packed):
+    return zlib.decompress(packed).decode("utf-8")
+
+def merge_chunks(chunks):
+    """Fold overlapping chunks into one text, returning (text, start offset of each chunk).
+
+    Consecutive chunks from RecursiveCharacterTextSplitter repeat up to
+    chunk_overlap characters of the previous chunk; each overlap is stored once
+    and every chunk remains the exact substring text[start:start + len(chunk)].
+    """
+    text = ""
+    starts = []
+    for chunk in chunks:
+        start = -1
+        if len(chunk) >= _MIN_OVERLAP:
+            # The earliest position in the tail where the rest of text is a prefix of chunk
+            probe = chunk[:_MIN_OVERLAP]
+            position = text.find(probe, max(0, len(text) - len(chunk)))
+            while position != -1:
+                if chunk.startswith(text[position:]):
+                    start = position
+                    break
+                position = text.find(probe, position + 1)
+        if start == -1:
+            if text:
+                text += "\n"
+            start = len(text)
+        text += chunk[len(text) - start:]
+        starts.append(start)
+    return text, starts
+
+def write_chunk_store(path, vectorstore, jobs):
+    """Write the jobs manifest and every chunk of vectorstore to path/chunks.sqlite.
+
+    jobs is JobDatabase.jobs ({job_id: {'filename', 'content_hash', ...}}).
+    The file is built beside the old one and swapped in with os.replace, so
+    readers that already have it open keep a consistent snapshot.
+    """
+    job_chunks = {job_id: [] for job_id in jobs}
+    filenames = {job_id: job['filename'] for job_id, job in jobs.items()}
+    if vectorstore is not None:
+        for row, doc_id in sorted(vectorstore.index_to_docstore_id.items()):
+            doc = vectorstore.docstore.search(doc_id)
+            job_id = doc.metadata['job_id']
+            job_chunks.setdefault(job_id, []).append((row, doc_id, doc.page_content))
+            filenames.setdefault(job_id, doc.metadata['filename'])
+
+    store_path = os.path.join(path, CHUNKS_NAME)
+    tmp_path = store_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE jobs (job_idx INTEGER PRIMARY KEY, job_id TEXT NOT NULL, "
+            "filename TEXT NOT NULL, content_hash TEXT, text BLOB NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE chunks (row INTEGER PRIMARY KEY, id BLOB NOT NULL UNIQUE, "
+            "job_idx INTEGER NOT NULL, start INTEGER NOT NULL, length INTEGER NOT NULL)"
+        )
+        for job_idx, (job_id, chunks) in enumerate(job_chunks.items()):
+            text, starts = merge_chunks([chunk for _, _, chunk in chunks])
+            content_hash = jobs.get(job_id, {}).get('content_hash')
+            conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?)",
+                         (job_idx, job_id, filenames[job_id], content_hash, _pack_text(text)))
+            conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+                [(row, _pack_id(doc_id), job_idx, start, len(chunk))
+                 for (row, doc_id, chunk), start in zip(chunks, starts)]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, store_path)
+
+def read_chunk_store(path):
+    """Load the whole store for code that modifies the database.
+
+    Returns (docstore, index_to_docstore_id, jobs) with jobs in the JobDatabase
+    manifest shape, including each job's chunk ids.
+    """
+    conn = sqlite3.connect(os.path.join(path, CHUNKS_NAME))
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+            return _read_chunk_store_v1(conn)
+        documents = {}
+        index_to_docstore_id = {}
+        jobs = {}
+        texts = {}
+        for job_idx, job_id, filename, content_hash, text in conn.execute(
+                "SELECT job_idx, job_id, filename, content_hash, text FROM jobs"):
+            jobs[job_id] = {'filename': filename, 'content_hash': content_hash, 'ids': []}
+            texts[job_idx] = (job_id, _unpack_text(text))
+        for row, packed, job_idx, start, length in conn.execute(
+                "SELECT row, id, job_idx, start, length FROM chunks ORDER BY row"):
+            doc_id = _unpack_id(packed)
+            job_id, text = texts[job_idx]
+            documents[doc_id] = Document(
+                id=doc_id,
+                page_content=text[start:start + length],
+                metadata={'job_id': job_id, 'filename': jobs[job_id]['filename']}
+            )
+            index_to_docstore_id[row] = doc_id
+            jobs[job_id]['ids'].append(doc_id)
+    finally:
+        conn.close()
+    return InMemoryDocstore(documents), index_to_docstore_id, jobs
+
+def _read_chunk_store_v1(conn):
+    documents = {}
+    index_to_docstore_id = {}
+    jobs = {}
+    for row, doc_id, job_id, filename, text in conn.execute(
+            "SELECT row, doc_id, job_id, filename, text FROM chunks ORDER BY row"):
+        documents[doc_id] = Document(id=doc_id, page_content=text, metadata={'job_id': job_id, 'filename': filename})
+        index_to_docstore_id[row] = doc_id
+        jobs.setdefault(job_id, {'filename': filename, 'content_hash': None, 'ids': []})['ids'].append(doc_id)
+    return InMemoryDocstore(documents), index_to_docstore_id, jobs
+
+class _ReadOnlyConnections:
+    # SQLite connections cannot be shared across threads, and Streamlit reruns scripts on
+    # different threads, so every thread gets its own read-only connection
+    def __init__(self, path):
+        self.uri = "file:" + os.path.abspath(os.path.join(path, CHUNKS_NAME)) + "?mode=ro"
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.uri, uri=True)
+        return conn
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore that fetches chunks from chunks.sqlite only when asked for.
+
+    Nothing is read at construction time, so opening a database costs the same
+    however many chunks it holds, and several processes share the OS page cache
+    instead of each unpickling its own copy. Chunk text is cut out of its job's
+    text on demand.
+    """
+
+    def __init__(self, path):
+        self._connections = _ReadOnlyConnections(path)
+        self._row_job_index = None
+
+    def search(self, search):
+        found = self._connections.get().execute(
+            "SELECT jobs.job_id, jobs.filename, jobs.text, chunks.start, chunks.length "
+            "FROM chunks JOIN jobs ON jobs.job_idx = chunks.job_idx WHERE chunks.id = ?",
+            (_pack_id(search),)
+        ).fetchone()
+        if found is None:
+            return f"ID {search} not found."
+        job_id, filename, text, start, length = found
+        page_content = _unpack_text(text)[start:start + length]
+        return Document(id=search, page_content=page_content, metadata={'job_id': job_id, 'filename': filename})
+
+    def row_job_index(self):
+        """(job_ids, row_to_job) for every FAISS row, read once and then kept."""
+        if self._row_job_index is None:
+            conn = self._connections.get()
+            names = dict(conn.execute("SELECT job_idx, job_id FROM jobs"))
+            row_jobs = np.fromiter(
+                (job_idx for job_idx, in conn.execute("SELECT job_idx FROM chunks ORDER BY row")),
+                dtype=np.int64
+            )
+            # Jobs without chunks get no column, same as when scanning the docstore
+            present, row_to_job = np.unique(row_jobs, return_inverse=True)
+            self._row_job_index = ([names[job_idx] for job_idx in present.tolist()], row_to_job)
+        return self._row_job_index
+
+class RowIdMap(Mapping):
+    """Lazy FAISS row -> docstore id mapping backed by chunks.sqlite."""
+
+    def __init__(self, path):
+        self._connections = _ReadOnlyConnections(path)
+
+    def __getitem__(self, row):
+        found = self._connections.get().execute("SELECT id FROM chunks WHERE row = ?", (int(row),)).fetchone()
+        if found is None:
+            raise KeyError(row)
+        return _unpack_id(found[0])
+
+    def __iter__(self):
+        for row, in self._connections.get().execute("SELECT row FROM chunks ORDER BY row"):
+            yield row
+
+    def __len__(self):
+        return self._connections.get().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
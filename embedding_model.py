@@ -0,0 +1,73 @@
+import os
+import threading
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from embedding_cache import CachedEmbeddings
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# How the model runs on CPU:
+#   torch       fp32 PyTorch, as before
+#   torch-int8  PyTorch with Linear layers dynamically quantized to int8
+#   onnx        ONNX Runtime with the model's exported onnx/model.onnx
+#   onnx-int8   ONNX Runtime with the int8 quantized export (EMBEDDING_ONNX_INT8_FILE)
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Selected per deployment; every entry point picks these up through load_embedding_model
+DEFAULT_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+# Inference threads (0 leaves the runtime's default, usually one per core)
+DEFAULT_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))
+# The all-MiniLM-L6-v2 repository ships several quantized exports; avx2 runs on any recent x86 CPU
+ONNX_INT8_FILE = os.environ.get("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+def create_embeddings(model_name=MODEL_NAME, backend="torch", threads=0):
+    """Build an uncached embedder for model_name on the given backend.
+
+    Every backend returns the same mean-pooled sentence-transformers vectors up
+    to numerical drift; benchmarks/bench_embeddings.py measures how much.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+    model_kwargs = {'device': "cpu"}
+    if backend.startswith("onnx"):
+        # Requires sentence-transformers >= 3.2 with the onnx extra (optimum + onnxruntime)
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+        model_kwargs['backend'] = "onnx"
+        model_kwargs['model_kwargs'] = {'provider': "CPUExecutionProvider", 'session_options': session_options}
+        if backend == "onnx-int8":
+            model_kwargs['model_kwargs']['file_name'] = ONNX_INT8_FILE
+    elif threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+    if backend == "torch-int8":
+        import torch
+        embeddings.client = torch.quantization.quantize_dynamic(embeddings.client, {torch.nn.Linear}, dtype=torch.qint8)
+    return embeddings
+
+def cosine_drift(reference, candidate):
+    """Row-wise cosine similarity between two (n, dim) embedding matrices of the same texts."""
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return np.einsum("ij,ij->i", reference, candidate) / np.maximum(norms, 1e-12)
+
+_models = {}
+_models_lock = threading.Lock()
+
+# Load the embedding model once per process, however many scripts, sessions or threads ask for it
+def load_embedding_model(model_name=MODEL_NAME, backend=None, threads=None):
+    backend = backend or DEFAULT_BACKEND
+    threads = DEFAULT_THREADS if threads is None else threads
+    key = (model_name, backend, threads)
+    with _models_lock:
+        if key not in _models:
+            # Backends drift slightly from the fp32 vectors, so each gets its own cache namespace;
+            # torch keeps the plain model name so existing cache entries stay valid
+            cache_name = model_name if backend == "torch" else f"{model_name}@{backend}"
+            _models[key] = CachedEmbeddings(create_embeddings(model_name, backend, threads), cache_name)
+        return _models[key]
@@ -0,0 +1,242 @@
+import os
+import re
+import numpy as np
+from lexical_index import tokenize
+
+# Per-job skills, years of experience and section labels, stored next to index.faiss
+FEATURES_NAME = "features.npz"
+
+# Canonical skill -> the token sequences (as lexical_index.tokenize produces them) that name it
+SKILLS = {
+    "python": ["python", "pyspark"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "sqlalchemy": ["sqlalchemy"],
+    "celery": ["celery"],
+    "sql": ["sql"],
+    "postgresql": ["postgresql", "postgres"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "sqlite": ["sqlite"],
+    "rest apis": ["rest apis", "rest api", "restful"],
+    "microservices": ["microservices"],
+    "unit testing": ["unit testing", "unit tests", "pytest", "jest"],
+    "java": ["java"],
+    "c++": ["c++", "stl"],
+    "c#": ["c#"],
+    "go": ["golang"],
+    "rust": ["rust"],
+    "cmake": ["cmake"],
+    "gdb": ["gdb", "valgrind"],
+    "multithreading": ["multithreading", "multithreaded", "multi threading", "concurrency"],
+    "networking": ["networking"],
+    "low latency": ["low latency"],
+    "rtos": ["rtos"],
+    "linux": ["linux", "unix"],
+    "bash": ["bash", "shell scripting"],
+    "git": ["git"],
+    "javascript": ["javascript", "js"],
+    "typescript": ["typescript"],
+    "react": ["react", "react.js", "reactjs", "redux", "next.js", "nextjs"],
+    "node.js": ["node.js", "nodejs"],
+    "css": ["css", "html"],
+    "webpack": ["webpack"],
+    "graphql": ["graphql"],
+    "accessibility": ["accessibility"],
+    "machine learning": ["machine learning", "ml", "scikit learn", "sklearn"],
+    "deep learning": ["deep learning", "pytorch", "tensorflow", "keras"],
+    "nlp": ["nlp", "natural language processing"],
+    "computer vision": ["computer vision", "opencv"],
+    "mlops": ["mlflow", "sagemaker", "mlops", "kubeflow"],
+    "pandas": ["pandas", "numpy"],
+    "docker": ["docker"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "ansible": ["ansible"],
+    "monitoring": ["prometheus", "grafana"],
+    "ci/cd": ["ci/cd", "jenkins", "github actions", "continuous integration"],
+    "aws": ["aws", "ec2", "s3"],
+    "azure": ["azure"],
+    "gcp": ["gcp", "google cloud"],
+    "spark": ["spark", "pyspark", "hadoop"],
+    "kafka": ["kafka"],
+    "airflow": ["airflow"],
+    "dbt": ["dbt"],
+    "snowflake": ["snowflake"],
+    "data modelling": ["data modelling", "data modeling"],
+    "data structures": ["data structures", "algorithms"],
+}
+SKILL_NAMES = tuple(SKILLS)
+
+# Section headings as they appear on a line of their own -> section label
+SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "objective": "summary",
+    "skills": "skills", "technical skills": "skills",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "projects": "projects",
+    "education": "education",
+    "about us": "about", "about": "about",
+    "role overview": "overview", "overview": "overview",
+    "responsibilities": "responsibilities",
+    "requirements": "requirements", "qualifications": "requirements",
+}
+SECTIONS = tuple(dict.fromkeys(SECTION_HEADINGS.values()))
+
+# Longest alias, in tokens
+_MAX_ALIAS = max(len(alias.split()) for aliases in SKILLS.values() for alias in aliases)
+_ALIASES = {tuple(alias.split()): skill for skill, aliases in SKILLS.items() for alias in aliases}
+
+# "3+ years", "4 years", "2–5 years", "2-5 yrs"
+_YEARS = re.compile(r"\b(\d{1,2})\s*(?:\+|(?:[-–—]|to)\s*(\d{1,2}))?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+
+def split_sections(text):
+    """Split text at section headings into (label, text) pairs.
+
+    Each section's text starts with its heading line; text before the first
+    heading is labelled None.
+    """
+    sections = []
+    label, lines = None, []
+    for line in text.splitlines():
+        heading = SECTION_HEADINGS.get(line.strip().rstrip(":").lower())
+        if heading is not None:
+            if any(part.strip() for part in lines):
+                sections.append((label, "\n".join(lines)))
+            label, lines = heading, []
+        lines.append(line)
+    if any(part.strip() for part in lines):
+        sections.append((label, "\n".join(lines)))
+    return sections
+
+def extract_skills(text):
+    """Canonical skills named anywhere in text."""
+    tokens = tokenize(text)
+    skills = set()
+    for i in range(len(tokens)):
+        for length in range(1, _MAX_ALIAS + 1):
+            skill = _ALIASES.get(tuple(tokens[i:i + length]))
+            if skill is not None:
+                skills.add(skill)
+    return skills
+
+def extract_years(text):
+    """(min, max) years of experience mentioned in text, or (None, None).
+
+    For a resume the max is the claimed experience; for a job description the
+    min is the requirement.
+    """
+    low = high = None
+    for match in _YEARS.finditer(text):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        low = start if low is None else min(low, start)
+        high = end if high is None else max(high, end)
+    return low, high
+
+def extract_features(text):
+    """{'skills', 'min_years', 'max_years', 'sections'} of one resume or job description."""
+    min_years, max_years = extract_years(text)
+    return {
+        'skills': sorted(extract_skills(text)),
+        'min_years': min_years,
+        'max_years': max_years,
+        'sections': [label for label, _ in split_sections(text) if label is not None],
+    }
+
+def pack_skills(skills):
+    """Pack a collection of canonical skills into a bitset over SKILL_NAMES."""
+    mask = np.zeros(len(SKILL_NAMES), dtype=bool)
+    for skill in skills:
+        mask[SKILL_NAMES.index(skill)] = True
+    return np.packbits(mask)
+
+def write_feature_table(path, features):
+    """Write {job_id: extract_features(...)} to path/features.npz as fixed-width columns."""
+    job_ids = list(features)
+    records = [features[job_id] for job_id in job_ids]
+    section_bits = [sum(1 << SECTIONS.index(label) for label in set(record['sections'])) for record in records]
+    features_path = os.path.join(path, FEATURES_NAME)
+    with open(features_path + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            job_ids=np.frombuffer("\n".join(job_ids).encode("utf-8"), dtype=np.uint8),
+            skill_names=np.frombuffer("\n".join(SKILL_NAMES).encode("utf-8"), dtype=np.uint8),
+            skill_bits=np.array([pack_skills(record['skills']) for record in records], dtype=np.uint8).reshape(
+                len(records), len(pack_skills(()))),
+            min_years=np.array([-1 if record['min_years'] is None else record['min_years'] for record in records],
+                               dtype=np.int16),
+            max_years=np.array([-1 if record['max_years'] is None else record['max_years'] for record in records],
+                               dtype=np.int16),
+            section_bits=np.array(section_bits, dtype=np.uint16),
+        )
+    os.replace(features_path + ".tmp", features_path)
+
+def _split(data):
+    text = data.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+def read_feature_table(path):
+    """Read path/features.npz back into {job_id: features}, or None if it is missing."""
+    table = FeatureTable.load(path)
+    if table is None:
+        return None
+    return {job_id: table.features(position) for position, job_id in enumerate(table.job_ids)}
+
+class FeatureTable:
+    """Columnar per-job features with bitset pre-filtering of plausible jobs for a resume."""
+
+    def __init__(self, job_ids, skill_bits, min_years, max_years, section_bits):
+        self.job_ids = job_ids
+        self.skill_bits = skill_bits
+        self.min_years = min_years
+        self.max_years = max_years
+        self.section_bits = section_bits
+        # Jobs that name no known skill cannot be judged and are always kept
+        self.no_skills = ~skill_bits.any(axis=1)
+
+    @classmethod
+    def load(cls, path):
+        """Open path/features.npz, or return None for a database without one."""
+        features_path = os.path.join(path, FEATURES_NAME)
+        if not os.path.exists(features_path):
+            return None
+        with np.load(features_path) as data:
+            names = _split(data['skill_names'])
+            bits = data['skill_bits']
+            if tuple(names) != SKILL_NAMES:
+                # Written with another skill list: line the stored bits up with the current one
+                stored = np.unpackbits(bits, axis=1, count=len(names)).astype(bool)
+                mask = np.zeros((len(bits), len(SKILL_NAMES)), dtype=bool)
+                for column, name in enumerate(names):
+                    if name in SKILLS:
+                        mask[:, SKILL_NAMES.index(name)] = stored[:, column]
+                bits = np.packbits(mask, axis=1)
+            return cls(_split(data['job_ids']), bits, data['min_years'], data['max_years'], data['section_bits'])
+
+    def features(self, position):
+        mask = np.unpackbits(self.skill_bits[position], count=len(SKILL_NAMES)).astype(bool)
+        min_years, max_years = int(self.min_years[position]), int(self.max_years[position])
+        return {
+            'skills': [skill for skill, present in zip(SKILL_NAMES, mask) if present],
+            'min_years': None if min_years < 0 else min_years,
+            'max_years': None if max_years < 0 else max_years,
+            'sections': [label for bit, label in enumerate(SECTIONS) if int(self.section_bits[position]) >> bit & 1],
+        }
+
+    def candidate_jobs(self, resume_features, min_shared_skills=1, years_slack=2):
+        """Boolean mask over job_ids of the jobs worth searching for one resume.
+
+        A job is kept if it shares at least min_shared_skills skills with the
+        resume (or names no known skill), and does not ask for more than
+        years_slack years beyond the resume's experience. A resume without known
+        skills keeps every job.
+        """
+        if not resume_features['skills']:
+            return np.ones(len(self.job_ids), dtype=bool)
+        shared = np.unpackbits(self.skill_bits & pack_skills(resume_features['skills']), axis=1).sum(axis=1)
+        keep = (shared >= min_shared_skills) | self.no_skills
+        if resume_features['max_years'] is not None:
+            keep &= self.min_years <= resume_features['max_years'] + years_slack
+        return keep
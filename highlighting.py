@@ -0,0 +1,146 @@
+import re
+
+# Words shorter than this are too common to be worth highlighting
+MIN_WORD_LENGTH = 4
+# A shared phrase must span at least this many tokens and more than MIN_PHRASE_CHARS characters
+MIN_PHRASE_TOKENS = 2
+MIN_PHRASE_CHARS = 10
+# Candidate start positions tried per repeated phrase window, to keep matching linear
+MAX_PHRASE_CANDIDATES = 8
+
+_TOKEN = re.compile(r'\w+')
+_BOLD = re.compile(r'\*\*.+?\*\*', re.DOTALL)
+
+def _tokenize(text):
+    """Return (starts, ends, lowercased words) of every word token in text."""
+    starts, ends, words = [], [], []
+    for match in _TOKEN.finditer(text):
+        starts.append(match.start())
+        ends.append(match.end())
+        words.append(match.group().lower())
+    return starts, ends, words
+
+def _common_runs(words1, words2):
+    """Find maximal runs of tokens shared by both texts.
+
+    Every MIN_PHRASE_TOKENS-token window of the second text is hashed once; the
+    first text is scanned left to right and each window hit is extended as far
+    as the tokens keep agreeing. Returns (start1, start2, length) token runs
+    that do not overlap in the first text.
+    """
+    window = MIN_PHRASE_TOKENS
+    positions = {}
+    for j in range(len(words2) - window + 1):
+        candidates = positions.setdefault(tuple(words2[j:j + window]), [])
+        if len(candidates) < MAX_PHRASE_CANDIDATES:
+            candidates.append(j)
+
+    runs = []
+    i = 0
+    while i <= len(words1) - window:
+        best_start, best_length = -1, 0
+        for j in positions.get(tuple(words1[i:i + window]), ()):
+            length = window
+            while i + length < len(words1) and j + length < len(words2) and words1[i + length] == words2[j + length]:
+                length += 1
+            if length > best_length:
+                best_start, best_length = j, length
+        if best_length:
+            runs.append((i, best_start, best_length))
+            i += best_length
+        else:
+            i += 1
+    return runs
+
+def _merge(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _clip(text, marks, pre_bold):
+    """Cut marks around the ** markers of text already in bold, so no <mark> crosses one."""
+    markers = sorted(marker for start, end in pre_bold for marker in ((start, start + 2), (end - 2, end)))
+    clipped = []
+    for start, end in marks:
+        pieces = []
+        position = start
+        for marker_start, marker_end in markers:
+            if marker_end <= position:
+                continue
+            if marker_start >= end:
+                break
+            pieces.append((position, marker_start))
+            position = max(position, marker_end)
+        pieces.append((position, end))
+        for piece_start, piece_end in pieces:
+            # Whitespace left between two markers is not worth a mark of its own
+            while piece_start < piece_end and text[piece_start].isspace():
+                piece_start += 1
+            while piece_end > piece_start and text[piece_end - 1].isspace():
+                piece_end -= 1
+            if piece_start < piece_end:
+                clipped.append((piece_start, piece_end))
+    return clipped
+
+def _render(text, starts, ends, words, common_words, marks):
+    """Emit text with common words in **bold** and marks in <mark>, in one pass."""
+    # Text the author already put in bold is left alone rather than wrapped twice
+    pre_bold = [(m.start(), m.end()) for m in _BOLD.finditer(text)]
+    if pre_bold:
+        marks = _clip(text, marks, pre_bold)
+
+    events = []
+    for start, end in marks:
+        events.append((start, 0, "<mark>"))
+        events.append((end, 1, "</mark>"))
+    b = 0
+    for start, end, word in zip(starts, ends, words):
+        if word not in common_words:
+            continue
+        while b < len(pre_bold) and pre_bold[b][1] <= start:
+            b += 1
+        if b < len(pre_bold) and pre_bold[b][0] <= start:
+            continue
+        events.append((start, 2, "**"))
+        events.append((end, -1, "**"))
+    # Bold nests inside marks: at a shared offset bold closes first and opens last
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    pieces = []
+    position = 0
+    for offset, _, tag in events:
+        pieces.append(text[position:offset])
+        pieces.append(tag)
+        position = offset
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+# Function to highlight matching words between two texts
+def highlight_matching_words(text1, text2):
+    starts1, ends1, words1 = _tokenize(text1)
+    starts2, ends2, words2 = _tokenize(text2)
+
+    # Find common words (more than 3 characters to avoid common words)
+    common_words = {word for word in words1 if len(word) >= MIN_WORD_LENGTH}
+    common_words.intersection_update(word for word in words2 if len(word) >= MIN_WORD_LENGTH)
+
+    # Also find common phrases as shared runs of tokens
+    common_phrases = []
+    marks1, marks2 = [], []
+    for i, j, length in _common_runs(words1, words2):
+        span1 = (starts1[i], ends1[i + length - 1])
+        if span1[1] - span1[0] <= MIN_PHRASE_CHARS:
+            continue
+        # Without the markers of any bold text the phrase runs through
+        common_phrases.append(text1[span1[0]:span1[1]].replace("**", ""))
+        marks1.append(span1)
+        marks2.append((starts2[j], ends2[j + length - 1]))
+
+    highlighted_text1 = _render(text1, starts1, ends1, words1, common_words, _merge(marks1))
+    highlighted_text2 = _render(text2, starts2, ends2, words2, common_words, _merge(marks2))
+
+    return highlighted_text1, highlighted_text2, common_words, common_phrases
@@ -0,0 +1,131 @@
+import json
+import math
+import os
+from types import SimpleNamespace
+import faiss
+import numpy as np
+
+# Index types that can be chosen when the job database is built
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+
+# Recorded next to index.faiss so readers know how to search the index
+CONFIG_NAME = "index_config.json"
+
+DEFAULT_CONFIG = {
+    'type': "flat",
+    # IVF: inverted lists to cluster into (0 picks one from the corpus size) and lists probed per query
+    'nlist': 0,
+    'nprobe': 8,
+    # HNSW: graph degree and search breadth
+    'hnsw_m': 32,
+    'ef_construction': 80,
+    'ef_search': 64,
+    # PQ: sub-quantizers per vector (must divide the dimension) and bits per code
+    'pq_m': 48,
+    'pq_nbits': 8,
+}
+
+def make_config(index_type="flat", **overrides):
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+    config = dict(DEFAULT_CONFIG, type=index_type)
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+def load_config(path):
+    """Read the index config stored in a job database directory (flat if none was recorded)."""
+    config_path = os.path.join(path, CONFIG_NAME)
+    if not os.path.exists(config_path):
+        return dict(DEFAULT_CONFIG)
+    with open(config_path, encoding="utf-8") as f:
+        return dict(DEFAULT_CONFIG, **json.load(f))
+
+def save_config(path, config):
+    with open(os.path.join(path, CONFIG_NAME), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+def supports_removal(config):
+    # IVF indexes keep their own ids after remove_ids and HNSW cannot remove at all,
+    # so only the flat index can drop rows the way LangChain's FAISS.delete expects
+    return config['type'] == "flat"
+
+def _nlist(config, n_vectors):
+    # faiss wants ~39 training points per centroid; an explicit nlist only needs one
+    nlist = config['nlist'] or min(int(4 * math.sqrt(n_vectors)), n_vectors // 39)
+    return max(1, min(nlist, n_vectors))
+
+def build_index(config, vectors):
+    """Create an empty FAISS index for config, trained on vectors when the type needs it."""
+    dim = vectors.shape[1]
+    index_type = config['type']
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config['hnsw_m'])
+        index.hnsw.efConstruction = config['ef_construction']
+        return index
+
+    quantizer = faiss.IndexFlatL2(dim)
+    nlist = _nlist(config, len(vectors))
+    if index_type == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        # Each PQ codebook needs at least 2 ** nbits training points
+        nbits = max(1, min(config['pq_nbits'], int(math.log2(max(len(vectors), 2)))))
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, config['pq_m'], nbits)
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+def read_index(path, config, mmap=False):
+    """Read index.faiss from a job database directory.
+
+    With mmap=True the vectors (or IVF inverted lists) are mapped from the file
+    rather than copied into memory, so loading is near-instant and processes
+    reading the same database share the page cache. A mapped index is read-only:
+    never add to or remove from it.
+    """
+    index_path = os.path.join(path, "index.faiss")
+    if not mmap:
+        return faiss.read_index(index_path)
+    if config['type'] in ("ivf", "ivfpq"):
+        flags = faiss.IO_FLAG_MMAP
+    else:
+        # Older faiss builds can only map IVF lists and read flat codes into memory
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(index_path, flags)
+
+def write_index(path, index):
+    # Replace rather than overwrite, so processes that mapped the old file keep a valid view
+    index_path = os.path.join(path, "index.faiss")
+    faiss.write_index(index, index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+
+def filtered_search_params(index, bitmap):
+    """SearchParameters limiting a search to the rows set in bitmap (np.packbits(mask, bitorder="little")).
+
+    Passing parameters overrides what apply_search_params set on the index, so
+    the index's current nprobe / efSearch are carried over.
+    """
+    if not isinstance(index, faiss.Index):
+        # A sharded index (see sharding) splits the bitmap and filters inside each shard
+        return SimpleNamespace(bitmap=bitmap)
+    selector = faiss.IDSelectorBitmap(bitmap)
+    if isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    elif isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # Both are only referenced from C++, so keep them alive as long as params
+    params.selector, params.bitmap = selector, bitmap
+    return params
+
+def apply_search_params(index, config, nprobe=None, ef_search=None):
+    """Set the query-time knobs of a loaded index, falling back to the recorded config."""
+    if not isinstance(index, faiss.Index):
+        index.set_search_params(config, nprobe, ef_search)
+        return
+    if config['type'] in ("ivf", "ivfpq"):
+        faiss.extract_index_ivf(index).nprobe = nprobe or config['nprobe']
+    elif config['type'] == "hnsw":
+        index.hnsw.efSearch = ef_search or config['ef_search']
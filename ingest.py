@@ -0,0 +1,269 @@
+"""Stream job description PDFs into the job database with resumable checkpoints.
+
+    python ingest.py --db job_database --jobs ./job_descriptions
+
+Files flow through extract -> split -> embed -> append one batch of chunks at
+a time, so memory held by the upload is bounded by the batch size rather than
+by how many files there are. Every few thousand chunks the jobs stored since
+the last checkpoint are appended to a log and a checkpoint is written, which
+costs as much as the jobs appended whatever the size of the database. The
+database itself is saved once at the end. An interrupted ingest resumes by
+running it again on the same files: the log is replayed (vectors come back
+from the embedding cache) and everything already stored is skipped by content
+hash before extraction. store_jobs.py runs the same pipeline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import metrics
+from features import split_sections
+from index_factory import INDEX_TYPES, make_config
+from job_store import content_hash
+from pdf_extraction import DEFAULT_TIMEOUT, iter_extracted_texts
+from sharding import load_job_database
+
+# Job descriptions are split into smaller chunks than resumes
+JOB_CHUNK_SIZE = 300
+JOB_CHUNK_OVERLAP = 100
+
+# Chunks embedded and appended to the index together
+INGEST_BATCH_CHUNKS = 512
+# Chunks appended between two checkpoints
+CHECKPOINT_CHUNKS = 5000
+
+# Progress of an unfinished ingest, next to index.faiss; removed once it completes
+CHECKPOINT_NAME = "ingest_checkpoint.json"
+# Jobs stored by the unfinished ingest, one JSON object per line, replayed when it resumes
+LOG_NAME = "ingest_log.jsonl"
+
+def job_id_for(filename):
+    # The file name without extension identifies a job, so re-uploading it replaces the old version.
+    # Files ingested from a directory tree keep their relative path, so a/JD.pdf and b/JD.pdf stay apart.
+    return os.path.splitext(filename.replace(os.sep, "/"))[0]
+
+def make_job_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=JOB_CHUNK_SIZE, chunk_overlap=JOB_CHUNK_OVERLAP)
+
+def split_job_text(text, splitter):
+    """Split a job description so that no chunk spans two sections (Responsibilities, Requirements, ...)."""
+    return [chunk for _, section in split_sections(text) for chunk in splitter.split_text(section)]
+
+def read_checkpoint(path):
+    checkpoint_path = os.path.join(path, CHECKPOINT_NAME)
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_checkpoint(path, checkpoint):
+    checkpoint_path = os.path.join(path, CHECKPOINT_NAME)
+    with open(checkpoint_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+def clear_checkpoint(path):
+    for name in (CHECKPOINT_NAME, LOG_NAME):
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
+
+def append_to_log(path, jobs):
+    """Append (job_id, filename, data_hash, chunks) tuples to the ingest log and flush them to disk."""
+    with open(os.path.join(path, LOG_NAME), "a", encoding="utf-8") as f:
+        for job_id, filename, data_hash, chunks in jobs:
+            f.write(json.dumps({'job_id': job_id, 'filename': filename, 'content_hash': data_hash,
+                                'chunks': chunks}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def iter_log(path, batch_chunks=INGEST_BATCH_CHUNKS):
+    """Batches of (job_id, filename, data_hash, chunks) tuples from the ingest log, about batch_chunks chunks each."""
+    log_path = os.path.join(path, LOG_NAME)
+    if not os.path.exists(log_path):
+        return
+    batch, batch_size = [], 0
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                job = json.loads(line)
+            except ValueError:
+                # A line cut short by the crash; the checkpoint was never written for it
+                break
+            batch.append((job['job_id'], job['filename'], job['content_hash'], job['chunks']))
+            batch_size += len(job['chunks'])
+            if batch_size >= batch_chunks:
+                yield batch
+                batch, batch_size = [], 0
+    if batch:
+        yield batch
+
+def iter_ingest(job_db, uploads, index_config=None, batch_chunks=INGEST_BATCH_CHUNKS,
+                checkpoint_chunks=CHECKPOINT_CHUNKS, max_workers=None, timeout=DEFAULT_TIMEOUT):
+    """Ingest (filename, pdf_bytes) pairs into job_db, yielding a progress event per step.
+
+    job_db is a JobDatabase or a sharding.ShardedJobDatabase. With index_config
+    the database is rebuilt from scratch with that index type. A checkpoint
+    left by an interrupted ingest of the same kind (adding, or rebuilding
+    with the same config and shard count) is resumed by replaying its log;
+    any other checkpoint is discarded. Events are dicts with an 'event' key:
+
+        resumed    jobs: stored by the interrupted ingest being continued
+        skipped    filename, status ("unchanged" or "duplicate"), before extraction
+        error      filename, error
+        split      filename, chunks
+        stored     jobs, chunks, statuses: one batch embedded and appended
+        checkpoint jobs, chunks: the jobs stored so far were logged
+        done       jobs, chunks, replaced, failed
+
+    The database is saved and the checkpoint removed before "done". A rebuild
+    that stores nothing leaves the saved database untouched.
+    """
+    checkpoint = read_checkpoint(job_db.path)
+    shards = getattr(job_db, "n_shards", 1)
+    if checkpoint is not None and (checkpoint['index_config'] != index_config or checkpoint.get('shards', 1) != shards):
+        clear_checkpoint(job_db.path)
+        checkpoint = None
+    if index_config is not None:
+        job_db.clear(index_config)
+    if checkpoint is not None:
+        # Nothing of the interrupted run was saved; its jobs come back from the log
+        for logged in iter_log(job_db.path, batch_chunks):
+            job_db.add_jobs(logged)
+        yield {'event': "resumed", 'jobs': len(checkpoint['stored'])}
+    else:
+        checkpoint = {'index_config': index_config, 'shards': shards, 'stored': [], 'failed': {}}
+
+    splitter = make_job_splitter()
+    # Filled while the extractor pulls uploads, so skips are reported in upload order
+    skipped = []
+    # Uploads being extracted, by position, as (filename, content hash); filenames need not be unique
+    pending = {}
+
+    def to_extract():
+        for position, (filename, data) in enumerate(uploads):
+            data_hash = content_hash(data)
+            status = job_db.stored_status(job_id_for(filename), data_hash)
+            if status is not None:
+                skipped.append({'event': "skipped", 'filename': filename, 'status': status})
+                continue
+            pending[str(position)] = (filename, data_hash)
+            yield str(position), data
+
+    batch = []
+    batch_size = 0
+    since_checkpoint = 0
+    # Jobs stored since the last checkpoint, appended to the log at the next one
+    unlogged = []
+    totals = {'jobs': 0, 'chunks': 0, 'replaced': 0}
+
+    def store_batch():
+        nonlocal batch, batch_size, since_checkpoint
+        statuses = job_db.add_jobs(batch)
+        stored_jobs = [job for job, status in zip(batch, statuses) if status in ("added", "replaced")]
+        stored = [filename for _, filename, _, _ in stored_jobs]
+        unlogged.extend(stored_jobs)
+        checkpoint['stored'].extend(stored)
+        totals['jobs'] += len(stored)
+        totals['chunks'] += batch_size
+        totals['replaced'] += statuses.count("replaced")
+        since_checkpoint += batch_size
+        event = {'event': "stored", 'jobs': len(stored), 'chunks': batch_size, 'statuses': dict(zip(
+            (filename for _, filename, _, _ in batch), statuses))}
+        batch, batch_size = [], 0
+        return event
+
+    def save_checkpoint():
+        nonlocal since_checkpoint
+        with metrics.timer("checkpoint", items=since_checkpoint):
+            # Only the new jobs are written; the full save waits until the ingest is done
+            os.makedirs(job_db.path, exist_ok=True)
+            append_to_log(job_db.path, unlogged)
+            write_checkpoint(job_db.path, dict(checkpoint, updated=time.strftime("%Y-%m-%dT%H:%M:%S%z")))
+        unlogged.clear()
+        since_checkpoint = 0
+        return {'event': "checkpoint", 'jobs': len(checkpoint['stored']), 'chunks': job_db.chunk_count}
+
+    for position, text, error in iter_extracted_texts(to_extract(), max_workers, timeout):
+        yield from skipped
+        skipped.clear()
+        filename, data_hash = pending.pop(position)
+        if error:
+            checkpoint['failed'][filename] = error
+            yield {'event': "error", 'filename': filename, 'error': error}
+            continue
+        if not text:
+            continue
+        with metrics.timer("split", document=filename) as timing:
+            chunks = split_job_text(text, splitter)
+            timing['items'] = len(chunks)
+        yield {'event': "split", 'filename': filename, 'chunks': len(chunks)}
+        batch.append((job_id_for(filename), filename, data_hash, chunks))
+        batch_size += len(chunks)
+        if batch_size >= batch_chunks:
+            yield store_batch()
+            if since_checkpoint >= checkpoint_chunks:
+                yield save_checkpoint()
+    yield from skipped
+    if batch:
+        yield store_batch()
+
+    # Including what an interrupted run stored before this one resumed it
+    if checkpoint['stored']:
+        if index_config is not None and index_config['type'] in ("ivf", "ivfpq"):
+            # The centroids were trained on the first batch only; retrain them on the whole corpus.
+            # Vectors come back from the embedding cache, so the model does not run again.
+            job_db.rebuild()
+        job_db.save()
+    clear_checkpoint(job_db.path)
+    yield dict(totals, event="done", failed=dict(checkpoint['failed']))
+
+def iter_pdf_uploads(root):
+    """(path relative to root, pdf_bytes) for every PDF under root, read one at a time."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, root), f.read()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store job description PDFs in the job database.")
+    parser.add_argument("--db", default="job_database", help="job database directory")
+    parser.add_argument("--jobs", required=True, help="directory of job description PDFs (searched recursively)")
+    parser.add_argument("--rebuild", choices=INDEX_TYPES, default=None, metavar="INDEX_TYPE",
+                        help="rebuild the database from scratch with this index type")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="with --rebuild, split the database into this many shards searched in parallel (1: unsharded)")
+    parser.add_argument("--batch-chunks", type=int, default=INGEST_BATCH_CHUNKS, help="chunks embedded per batch")
+    parser.add_argument("--checkpoint-chunks", type=int, default=CHECKPOINT_CHUNKS,
+                        help="chunks stored between checkpoints")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per PDF")
+    args = parser.parse_args(argv)
+    if args.shards is not None and (args.rebuild is None or args.shards < 1):
+        parser.error("--shards needs --rebuild and must be at least 1")
+
+    from embedding_model import load_embedding_model
+    os.makedirs(args.db, exist_ok=True)
+    job_db = load_job_database(args.db, load_embedding_model(), args.shards)
+    index_config = make_config(args.rebuild) if args.rebuild else None
+    for event in iter_ingest(job_db, iter_pdf_uploads(args.jobs), index_config, args.batch_chunks,
+                             args.checkpoint_chunks, args.workers, args.timeout):
+        kind = event['event']
+        if kind == "error":
+            print(f"Error processing {event['filename']}: {event['error']}", file=sys.stderr)
+        elif kind == "resumed":
+            print(f"Resuming an interrupted ingest ({event['jobs']} job descriptions already stored)", file=sys.stderr)
+        elif kind == "checkpoint":
+            print(f"Checkpoint: {event['jobs']} job descriptions, {event['chunks']} chunks", file=sys.stderr)
+        elif kind == "done":
+            print(f"Stored {event['jobs']} job descriptions ({event['chunks']} chunks, {event['replaced']} replaced, "
+                  f"{len(event['failed'])} failed); {len(job_db)} in the database", file=sys.stderr)
+            return 1 if event['failed'] and not event['jobs'] else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
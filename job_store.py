@@ -0,0 +1,377 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+import metrics
+from chunk_store import CHUNKS_NAME, RowIdMap, SQLiteDocstore, merge_chunks, read_chunk_store, write_chunk_store
+from features import FEATURES_NAME, extract_features, read_feature_table, write_feature_table
+from index_factory import (DEFAULT_CONFIG, apply_search_params, build_index, load_config, read_index,
+                           save_config, supports_removal, write_index)
+from lexical_index import LEXICAL_NAME, LexicalIndex
+from matching import embed_texts
+
+# Manifest written next to index.faiss before it moved into the jobs table of chunks.sqlite
+MANIFEST_NAME = "jobs.json"
+
+# Docstore pickle written by LangChain's FAISS.save_local before chunks.sqlite existed
+LEGACY_DOCSTORE_NAME = "index.pkl"
+
+# A sharded database (see sharding) records its shard count here and keeps each
+# shard as a complete job database in a subdirectory
+SHARDS_NAME = "shards.json"
+SHARD_DIR = "shard_{:03d}"
+
+def read_shard_count(path):
+    """The number of shards of the database at path, or None if it is not sharded."""
+    shards_path = os.path.join(path, SHARDS_NAME)
+    if not os.path.exists(shards_path):
+        return None
+    with open(shards_path, encoding="utf-8") as f:
+        return json.load(f)["shards"]
+
+def remove_shards(path, keep=0):
+    """Delete shard directories numbered keep and above, and shards.json if keep is 0."""
+    if keep == 0 and os.path.exists(os.path.join(path, SHARDS_NAME)):
+        os.remove(os.path.join(path, SHARDS_NAME))
+    shard = keep
+    while os.path.isdir(os.path.join(path, SHARD_DIR.format(shard))):
+        shutil.rmtree(os.path.join(path, SHARD_DIR.format(shard)))
+        shard += 1
+
+# A save writes every file here first and moves them into the database once all are complete
+SAVING_DIR = ".saving"
+# Written into SAVING_DIR last; lists the files the save removes
+SAVED_MARKER = "saved.json"
+
+def finish_save(path):
+    """Complete a save that was interrupted after all its files were written, or discard one that was not.
+
+    Called before a database is opened or saved, so the files in path always
+    come from a single save.
+    """
+    staging = os.path.join(path, SAVING_DIR)
+    if not os.path.isdir(staging):
+        return
+    marker_path = os.path.join(staging, SAVED_MARKER)
+    if os.path.exists(marker_path):
+        with open(marker_path, encoding="utf-8") as f:
+            remove = json.load(f)["remove"]
+        for name in os.listdir(staging):
+            if name == SAVED_MARKER:
+                continue
+            try:
+                os.replace(os.path.join(staging, name), os.path.join(path, name))
+            except FileNotFoundError:
+                # Another process finishing the same save moved it first
+                pass
+        for name in remove:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+    shutil.rmtree(staging, ignore_errors=True)
+
+def check_row_count(path, index, row_count):
+    # Rows are renumbered by deletes, so chunks.sqlite from another save would label the wrong vectors
+    if index.ntotal != row_count:
+        raise ValueError(
+            f"{path}: index.faiss has {index.ntotal} rows but chunks.sqlite has {row_count}; "
+            f"the files come from different saves"
+        )
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of a job description's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def database_fingerprint(path):
+    """Identify the current contents of a job database by its files' sizes and mtimes.
+
+    Changes whenever store_jobs saves, so it can key caches of the loaded database.
+    A sharded database's fingerprint covers every shard.
+    """
+    shards = read_shard_count(path)
+    if shards is not None:
+        return tuple(database_fingerprint(os.path.join(path, SHARD_DIR.format(shard))) for shard in range(shards))
+    fingerprint = []
+    for name in ("index.faiss", LEXICAL_NAME, FEATURES_NAME, CHUNKS_NAME):
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except FileNotFoundError:
+            fingerprint.append(None)
+        else:
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+def database_version(path):
+    """Short JSON-safe digest of database_fingerprint, for caches keyed across processes or HTTP."""
+    return hashlib.sha1(repr(database_fingerprint(path)).encode("utf-8")).hexdigest()[:16]
+
+def check_job_database(path):
+    """Raise FileNotFoundError unless path holds a job database open_job_vectorstore can open."""
+    if not os.path.exists(os.path.join(path, CHUNKS_NAME)):
+        if os.path.exists(os.path.join(path, LEGACY_DOCSTORE_NAME)):
+            raise FileNotFoundError(
+                f"{path} uses the old pickle format; open it once with store_jobs.py to convert it"
+            )
+        raise FileNotFoundError(f"No job database found in {path}")
+
+def open_job_vectorstore(path, embeddings, nprobe=None, ef_search=None):
+    """Open a job database read-only for searching.
+
+    The index is memory-mapped and chunks are fetched lazily from
+    chunks.sqlite, so this takes about the same time for any corpus size and
+    never unpickles anything. The returned vectorstore must not be modified.
+    """
+    finish_save(path)
+    check_job_database(path)
+    with metrics.timer("index_open"):
+        index_config = load_config(path)
+        index = read_index(path, index_config, mmap=True)
+        row_ids = RowIdMap(path)
+        check_row_count(path, index, len(row_ids))
+        apply_search_params(index, index_config, nprobe, ef_search)
+        return FAISS(embeddings, index, SQLiteDocstore(path), row_ids)
+
+class JobDatabase:
+    """Append-only job description store on top of a LangChain FAISS index.
+
+    The manifest maps every job_id to its source filename, the hash of the
+    uploaded PDF and the docstore ids of its chunks (saved as the jobs table
+    of chunks.sqlite), so unchanged uploads are skipped and edited ones can be
+    swapped without re-embedding the rest.
+    The FAISS index type comes from index_config (see index_factory) and is
+    saved alongside the index, as are the BM25 postings of every chunk
+    (see lexical_index) and the skills, years and sections of every job (see
+    features), which are updated with the same chunks.
+    """
+
+    def __init__(self, path, embeddings, vectorstore=None, jobs=None, index_config=None, lexical=None, features=None):
+        self.path = path
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.jobs = jobs if jobs is not None else {}
+        self.index_config = index_config if index_config is not None else dict(DEFAULT_CONFIG)
+        if lexical is None:
+            lexical = LexicalIndex.from_vectorstore(vectorstore) if vectorstore is not None else LexicalIndex()
+        self.lexical = lexical
+        if features is None or features.keys() != self.jobs.keys():
+            features = self._features_from_docstore(vectorstore, self.jobs)
+        self.features = features
+
+    @classmethod
+    def load(cls, path, embeddings):
+        """Open the database at path, or return an empty one if none exists yet."""
+        with metrics.timer("index_load") as timing:
+            db = cls._load(path, embeddings)
+            timing['items'] = db.chunk_count
+        return db
+
+    @classmethod
+    def _load(cls, path, embeddings):
+        finish_save(path)
+        index_config = load_config(path)
+        if not os.path.exists(os.path.join(path, "index.faiss")):
+            return cls(path, embeddings, index_config=index_config)
+
+        if os.path.exists(os.path.join(path, CHUNKS_NAME)):
+            docstore, index_to_docstore_id, jobs = read_chunk_store(path)
+            index = read_index(path, index_config)
+            check_row_count(path, index, len(index_to_docstore_id))
+            vectorstore = FAISS(embeddings, index, docstore, index_to_docstore_id)
+            # Rebuilt from the chunk texts by __init__ if missing or out of step with the index
+            lexical = LexicalIndex.read(path, index_to_docstore_id)
+            features = read_feature_table(path)
+        else:
+            # One-time conversion of a database from before chunks.sqlite: this is the only
+            # place the pickle is ever read, and save() deletes it afterwards
+            vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+            jobs = cls._jobs_from_docstore(vectorstore)
+            lexical = features = None
+        # Older databases kept the manifest (and so the content hashes) in jobs.json
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                jobs = json.load(f)["jobs"]
+        return cls(path, embeddings, vectorstore, jobs, index_config, lexical, features)
+
+    @staticmethod
+    def _jobs_from_docstore(vectorstore):
+        # Databases written before the manifest existed: rebuild it from chunk metadata.
+        # Their content hash is unknown, so the first re-upload of each job replaces it.
+        jobs = {}
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            metadata = vectorstore.docstore.search(doc_id).metadata
+            job = jobs.setdefault(metadata['job_id'], {
+                'filename': metadata['filename'],
+                'content_hash': None,
+                'ids': []
+            })
+            job['ids'].append(doc_id)
+        return jobs
+
+    @staticmethod
+    def _features_from_docstore(vectorstore, jobs):
+        # Databases saved before features.npz: extract them from each job's stored chunks
+        if vectorstore is None:
+            return {}
+        return {
+            job_id: extract_features(merge_chunks([vectorstore.docstore.search(doc_id).page_content
+                                                   for doc_id in job['ids']])[0])
+            for job_id, job in jobs.items()
+        }
+
+    def __contains__(self, job_id):
+        return job_id in self.jobs
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @property
+    def chunk_count(self):
+        return self.vectorstore.index.ntotal if self.vectorstore is not None else 0
+
+    def stored_status(self, job_id, data_hash):
+        """Return "unchanged" or "duplicate" if this content is already stored, else None.
+
+        Lets callers skip PDF extraction for uploads that would not change the index.
+        """
+        existing = self.jobs.get(job_id)
+        if existing is not None and existing['content_hash'] == data_hash:
+            return "unchanged"
+        if any(job['content_hash'] == data_hash for job in self.jobs.values()):
+            return "duplicate"
+        return None
+
+    def add_job(self, job_id, filename, data_hash, chunks):
+        """Add or replace one job's chunks.
+
+        Returns "unchanged" if the same content is already stored for job_id,
+        "duplicate" if it is stored under another job_id, "replaced" if an older
+        version of job_id was swapped out, and "added" otherwise.
+        """
+        return self.add_jobs([(job_id, filename, data_hash, chunks)])[0]
+
+    def add_jobs(self, new_jobs):
+        """Add or replace many jobs, given as (job_id, filename, data_hash, chunks) tuples.
+
+        All new chunks are embedded in one batch, and an index that needs
+        training is trained on that batch when the database is empty. Returns
+        one add_job status per job, or "superseded" for a job whose job_id
+        comes again later in new_jobs: only the last copy is stored.
+        """
+        last = {job_id: position for position, (job_id, _, _, _) in enumerate(new_jobs)}
+        statuses = []
+        stale_ids = []
+        texts, metadatas, ids = [], [], []
+        for position, (job_id, filename, data_hash, chunks) in enumerate(new_jobs):
+            if last[job_id] != position:
+                # Its chunks would otherwise be queued for removal before they were ever added
+                statuses.append("superseded")
+                continue
+            status = self.stored_status(job_id, data_hash)
+            if status is not None:
+                statuses.append(status)
+                continue
+            existing = self.jobs.pop(job_id, None)
+            if existing is not None:
+                stale_ids.extend(existing['ids'])
+
+            job_ids = [str(uuid.uuid4()) for _ in chunks]
+            self.jobs[job_id] = {'filename': filename, 'content_hash': data_hash, 'ids': job_ids}
+            with metrics.timer("features", items=1, document=filename):
+                self.features[job_id] = extract_features(merge_chunks(chunks)[0])
+            texts.extend(chunks)
+            metadatas.extend({'job_id': job_id, 'filename': filename} for _ in chunks)
+            ids.extend(job_ids)
+            statuses.append("replaced" if existing is not None else "added")
+
+        if stale_ids:
+            self._remove_chunks(stale_ids)
+        if texts:
+            self._add_chunks(texts, embed_texts(self.embeddings, texts), metadatas, ids)
+            with metrics.timer("lexical_add", items=len(texts)):
+                self.lexical.add(ids, texts)
+        return statuses
+
+    def delete_job(self, job_id):
+        """Remove every chunk of job_id from the index and the manifest."""
+        job = self.jobs.pop(job_id)
+        self.features.pop(job_id, None)
+        if job['ids']:
+            self._remove_chunks(job['ids'])
+
+    def rebuild(self, index_config=None):
+        """Rebuild the index from the stored chunks, optionally switching index type.
+
+        Vectors come back through the embedding cache, so this retrains IVF
+        centroids on the current corpus without running the model again.
+        """
+        if index_config is not None:
+            self.index_config = index_config
+        self._rebuild(exclude=())
+
+    def _add_chunks(self, texts, vectors, metadatas, ids):
+        # Includes training when the index is built from scratch
+        with metrics.timer("index_add", items=len(texts)):
+            if self.vectorstore is None:
+                index = build_index(self.index_config, vectors)
+                self.vectorstore = FAISS(self.embeddings, index, InMemoryDocstore(), {})
+            self.vectorstore.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+    def _remove_chunks(self, ids):
+        self.lexical.remove(ids)
+        if supports_removal(self.index_config):
+            self.vectorstore.delete(ids)
+        else:
+            self._rebuild(exclude=set(ids))
+
+    def _rebuild(self, exclude):
+        if self.vectorstore is None:
+            return
+        texts, metadatas, ids = [], [], []
+        for _, doc_id in sorted(self.vectorstore.index_to_docstore_id.items()):
+            if doc_id in exclude:
+                continue
+            doc = self.vectorstore.docstore.search(doc_id)
+            texts.append(doc.page_content)
+            metadatas.append(doc.metadata)
+            ids.append(doc_id)
+        self.vectorstore = None
+        if texts:
+            self._add_chunks(texts, embed_texts(self.embeddings, texts), metadatas, ids)
+
+    def clear(self, index_config=None):
+        self.vectorstore = None
+        self.jobs = {}
+        self.lexical = LexicalIndex()
+        self.features = {}
+        if index_config is not None:
+            self.index_config = index_config
+
+    def save(self):
+        with metrics.timer("index_save", items=self.chunk_count):
+            self._save()
+
+    def _save(self):
+        os.makedirs(self.path, exist_ok=True)
+        finish_save(self.path)
+        # Every file is written to SAVING_DIR and only moved over the live ones once all of them are
+        # complete, so a crash mid-save leaves either the old set of files or the new one
+        staging = os.path.join(self.path, SAVING_DIR)
+        os.makedirs(staging)
+        save_config(staging, self.index_config)
+        if self.vectorstore is not None:
+            write_index(staging, self.vectorstore.index)
+            self.lexical.write(staging, self.vectorstore.index_to_docstore_id)
+            write_feature_table(staging, self.features)
+            write_chunk_store(staging, self.vectorstore, self.jobs)
+            stale = [LEGACY_DOCSTORE_NAME, MANIFEST_NAME]
+        else:
+            stale = ["index.faiss", LEXICAL_NAME, FEATURES_NAME, CHUNKS_NAME, LEGACY_DOCSTORE_NAME, MANIFEST_NAME]
+        with open(os.path.join(staging, SAVED_MARKER + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump({'remove': stale}, f)
+        os.replace(os.path.join(staging, SAVED_MARKER + ".tmp"), os.path.join(staging, SAVED_MARKER))
+        finish_save(self.path)
+        # Saving unsharded replaces a sharded layout that was there before
+        remove_shards(self.path)
@@ -0,0 +1,209 @@
+import os
+import re
+from collections import Counter
+import numpy as np
+
+# Postings of every job chunk, stored next to index.faiss
+LEXICAL_NAME = "lexical.npz"
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Keeps skills like "c++", "c#", "node.js" and "ci/cd" as single terms; a trailing "." or "/" is not part of a term
+_TERM = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./][a-z0-9+#]+)*")
+
+# Words that appear in nearly every chunk and only add postings to walk
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we were will with you your".split()
+)
+
+def tokenize(text):
+    return [term for term in _TERM.findall(text.lower()) if term not in STOP_WORDS]
+
+class LexicalIndex:
+    """Term counts of every job chunk, keyed by docstore id so JobDatabase can update it in place.
+
+    Adding a job only tokenizes its new chunks, and removing one drops its
+    entries. write() compiles the counts into postings arrays in FAISS row
+    order (see Bm25Index); read() turns those arrays back into counts without
+    re-tokenizing any text.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        # Databases saved before the lexical index existed
+        lexical = cls()
+        doc_ids = list(vectorstore.index_to_docstore_id.values())
+        lexical.add(doc_ids, [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids])
+        return lexical
+
+    def add(self, doc_ids, texts):
+        for doc_id, text in zip(doc_ids, texts):
+            counts = Counter(tokenize(text))
+            term_ids = np.fromiter(
+                (self.vocabulary.setdefault(term, len(self.vocabulary)) for term in counts),
+                dtype=np.int32, count=len(counts)
+            )
+            self.documents[doc_id] = (term_ids, np.fromiter(counts.values(), dtype=np.int32, count=len(counts)))
+
+    def remove(self, doc_ids):
+        for doc_id in doc_ids:
+            self.documents.pop(doc_id, None)
+
+    def write(self, path, index_to_docstore_id):
+        """Write postings for rows 0..n-1 of the FAISS index to path/lexical.npz."""
+        n_rows = len(index_to_docstore_id)
+        row_terms, row_counts = [], []
+        for _, doc_id in sorted(index_to_docstore_id.items()):
+            term_ids, counts = self.documents[doc_id]
+            row_terms.append(term_ids)
+            row_counts.append(counts)
+        row_lengths = np.array([len(term_ids) for term_ids in row_terms], dtype=np.int64)
+        terms = np.concatenate(row_terms) if row_terms else np.empty(0, dtype=np.int32)
+        counts = np.concatenate(row_counts) if row_counts else np.empty(0, dtype=np.int32)
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), row_lengths)
+
+        # Terms no chunk uses any more are dropped, so the vocabulary never grows without bound
+        used, term_of_posting = np.unique(terms, return_inverse=True)
+        order = np.argsort(term_of_posting, kind="stable")
+        offsets = np.r_[0, np.cumsum(np.bincount(term_of_posting, minlength=len(used)))].astype(np.int64)
+        words = list(self.vocabulary)
+        vocabulary = "\n".join(words[term] for term in used.tolist()).encode("utf-8")
+        tokens = np.bincount(rows, weights=counts, minlength=n_rows).astype(np.int32)
+
+        lexical_path = os.path.join(path, LEXICAL_NAME)
+        with open(lexical_path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                vocabulary=np.frombuffer(vocabulary, dtype=np.uint8),
+                offsets=offsets,
+                rows=rows[order],
+                counts=np.minimum(counts[order], np.iinfo(np.uint16).max).astype(np.uint16),
+                row_lengths=tokens,
+            )
+        os.replace(lexical_path + ".tmp", lexical_path)
+
+    @classmethod
+    def read(cls, path, index_to_docstore_id):
+        """Load path/lexical.npz for updating, or None if it is missing or does not match the index."""
+        arrays = _load_arrays(path)
+        if arrays is None or len(arrays['row_lengths']) != len(index_to_docstore_id):
+            return None
+        words, offsets, rows, counts, _ = arrays.values()
+        lexical = cls()
+        lexical.vocabulary = {word: term for term, word in enumerate(words)}
+        terms = np.repeat(np.arange(len(words), dtype=np.int32), np.diff(offsets))
+        # Regroup the postings by row; within a row they stay in term order
+        order = np.argsort(rows, kind="stable")
+        ends = np.cumsum(np.bincount(rows, minlength=len(index_to_docstore_id)))
+        terms, counts = terms[order], counts[order].astype(np.int32)
+        start = 0
+        for row, end in enumerate(ends.tolist()):
+            lexical.documents[index_to_docstore_id[row]] = (terms[start:end], counts[start:end])
+            start = end
+        return lexical
+
+def _load_arrays(path):
+    lexical_path = os.path.join(path, LEXICAL_NAME)
+    if not os.path.exists(lexical_path):
+        return None
+    with np.load(lexical_path) as data:
+        vocabulary = data['vocabulary'].tobytes().decode("utf-8")
+        return {
+            'words': vocabulary.split("\n") if vocabulary else [],
+            'offsets': data['offsets'],
+            'rows': data['rows'],
+            'counts': data['counts'],
+            'row_lengths': data['row_lengths'],
+        }
+
+class Bm25Index:
+    """Read-only BM25 scorer over the postings written by LexicalIndex.write.
+
+    Every posting's BM25 weight is computed once at load time, so scoring a
+    resume is a single pass over the postings of its distinct terms.
+    """
+
+    def __init__(self, words, offsets, rows, counts, row_lengths, k1=BM25_K1, b=BM25_B):
+        self.vocabulary = {word: term for term, word in enumerate(words)}
+        self.offsets = offsets
+        self.rows = rows
+        self.n_rows = len(row_lengths)
+
+        document_frequency = np.diff(offsets)
+        idf = np.log1p((self.n_rows - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = max(float(row_lengths.mean()), 1.0) if self.n_rows else 1.0
+        tf = counts.astype(np.float32)
+        norm = k1 * (1 - b + b * row_lengths[rows] / average_length)
+        self.weights = (np.repeat(idf, document_frequency) * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    @classmethod
+    def load(cls, path, n_rows=None):
+        """Open path/lexical.npz, or return None for a database without one.
+
+        With n_rows (the index's row count), postings for a different number
+        of rows are treated as missing rather than scoring the wrong chunks.
+        """
+        arrays = _load_arrays(path)
+        if arrays is None or (n_rows is not None and len(arrays['row_lengths']) != n_rows):
+            return None
+        return cls(*arrays.values())
+
+    @classmethod
+    def load_concatenated(cls, paths, sizes):
+        """Open the postings of several databases as one index over their rows laid end to end.
+
+        sizes[i] is the row count of paths[i]. Scores use the statistics of
+        all rows together, so they equal those of a single database holding
+        every chunk. Returns None if no database has postings.
+        """
+        vocabulary = {}
+        terms, rows, counts, row_lengths = [], [], [], []
+        start = 0
+        found = False
+        for path, size in zip(paths, sizes):
+            arrays = _load_arrays(path)
+            if arrays is None or len(arrays['row_lengths']) != size:
+                # No postings for this part: its rows never match a term
+                row_lengths.append(np.zeros(size, dtype=np.int32))
+            else:
+                found = True
+                term_ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for word in arrays['words']),
+                                       dtype=np.int64, count=len(arrays['words']))
+                terms.append(np.repeat(term_ids, np.diff(arrays['offsets'])))
+                rows.append(arrays['rows'].astype(np.int64) + start)
+                counts.append(arrays['counts'])
+                row_lengths.append(arrays['row_lengths'])
+            start += size
+        if not found:
+            return None
+        terms = np.concatenate(terms)
+        order = np.argsort(terms, kind="stable")
+        offsets = np.r_[0, np.cumsum(np.bincount(terms, minlength=len(vocabulary)))].astype(np.int64)
+        return cls(list(vocabulary), offsets, np.concatenate(rows)[order], np.concatenate(counts)[order],
+                   np.concatenate(row_lengths))
+
+    def score_rows(self, text):
+        """BM25 score of text as a query against every chunk (FAISS row)."""
+        terms = [self.vocabulary[term] for term in set(tokenize(text)) if term in self.vocabulary]
+        if not terms:
+            return np.zeros(self.n_rows, dtype=np.float64)
+        postings = np.concatenate([np.arange(self.offsets[term], self.offsets[term + 1]) for term in terms])
+        return np.bincount(self.rows[postings], weights=self.weights[postings], minlength=self.n_rows)
+
+    def score_jobs(self, texts, row_to_job, n_jobs):
+        """(len(texts), n_jobs) matrix of each job's best chunk score for each text."""
+        scores = np.zeros((len(texts), n_jobs), dtype=np.float64)
+        for position, text in enumerate(texts):
+            row_scores = self.score_rows(text)
+            hit = np.flatnonzero(row_scores)
+            np.maximum.at(scores[position], row_to_job[hit], row_scores[hit])
+        return scores
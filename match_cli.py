@@ -0,0 +1,101 @@
+"""Match a directory of resume PDFs against the job database without Streamlit.
+
+    python match_cli.py --db job_database --resumes ./resumes --out results.jsonl
+
+Writes one JSON object per resume as soon as its batch is matched, so large
+exports can run unattended and be tailed while they are in progress.
+"""
+import argparse
+import json
+import os
+import sys
+import metrics
+from embedding_model import load_embedding_model
+from pdf_extraction import DEFAULT_TIMEOUT
+from resume_matcher import LEXICAL_WEIGHT, RESUME_BATCH_SIZE, ResumeMatcher, result_to_json
+from scoring import AGGREGATIONS
+from sharding import check_search_database, open_search_database
+
+# Walk the resume directory lazily so huge exports never build a full file list
+def iter_pdf_paths(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.join(dirpath, filename)
+
+def iter_uploads(root):
+    for path in iter_pdf_paths(root):
+        with open(path, "rb") as f:
+            yield os.path.relpath(path, root), f.read()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match resume PDFs against the job database.")
+    parser.add_argument("--db", default="job_database", help="job database directory written by store_jobs.py")
+    parser.add_argument("--resumes", required=True, help="directory of resume PDFs (searched recursively)")
+    parser.add_argument("--out", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("--aggregation", choices=AGGREGATIONS, default="max",
+                        help="how chunk similarities are combined into a job score")
+    parser.add_argument("--lexical-weight", type=float, default=LEXICAL_WEIGHT,
+                        help="share of the job ranking decided by BM25 keyword scores (0 to 1)")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="search every job for every resume instead of only those sharing skills with it")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF lists probed per query (default: recorded config)")
+    parser.add_argument("--ef-search", type=int, default=None, help="HNSW search breadth (default: recorded config)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="search the shards of a sharded database in this process instead of one worker each")
+    parser.add_argument("--batch-size", type=int, default=RESUME_BATCH_SIZE, help="resumes matched per batch")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per PDF")
+    parser.add_argument("--metrics-out", default=None, help="write per-stage timings as JSON to this file")
+    parser.add_argument("--profile", default=None, metavar="DIR", help="write a cProfile dump of the run to DIR")
+    args = parser.parse_args(argv)
+    with metrics.profiled("match_cli", args.profile):
+        status = run(args, parser)
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
+    return status
+
+def run(args, parser):
+    if not 0 <= args.lexical_weight <= 1:
+        parser.error("--lexical-weight must be between 0 and 1")
+    # Before the model load, so a wrong --db fails at once
+    try:
+        check_search_database(args.db)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    embeddings = load_embedding_model()
+    try:
+        vectorstore, lexical_index, feature_table = open_search_database(
+            args.db, embeddings, args.nprobe, args.ef_search, processes=not args.in_process
+        )
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    matcher = ResumeMatcher(vectorstore, embeddings, aggregation=args.aggregation,
+                            lexical_index=lexical_index, lexical_weight=args.lexical_weight,
+                            feature_table=None if args.no_prefilter else feature_table)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    matched = failed = 0
+    try:
+        results = matcher.iter_results(iter_uploads(args.resumes), args.batch_size, args.workers, args.timeout)
+        for result in results:
+            out.write(result_to_json(result) + "\n")
+            out.flush()
+            if 'error' in result:
+                failed += 1
+                print(f"Error processing {result['resume_name']}: {result['error']}", file=sys.stderr)
+            else:
+                matched += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        close = getattr(vectorstore.index, "close", None)
+        if close is not None:
+            close()
+    print(f"Matched {matched} resumes ({failed} failed)", file=sys.stderr)
+    return 1 if failed and not matched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""Serve resume matching to many users at once from one model and one job database.
+
+    python match_service.py --db job_database --port 8765
+
+Concurrent requests are queued and coalesced into micro-batches, so the
+embedding model and the FAISS search run once per batch rather than once per
+user. search_resumes.py talks to a running service when MATCH_SERVICE_URL is
+set, and runs the same service in-process otherwise.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import metrics
+from index_factory import apply_search_params, load_config
+from job_store import database_fingerprint, database_version
+from sharding import open_search_database
+from resume_matcher import LEXICAL_WEIGHT, RESUME_BATCH_SIZE, ResumeMatcher, result_to_json
+
+DEFAULT_PORT = 8765
+
+# Longest the first request of a batch waits for others to join it
+MAX_WAIT = 0.01
+# Resumes allowed to wait for a batch before new requests are turned away
+MAX_QUEUE = 256
+# Request latencies kept for the percentile report
+LATENCY_WINDOW = 10_000
+
+class ServiceBusy(Exception):
+    """The request queue is full; the caller should retry later."""
+
+class LatencyStats:
+    """Latencies of the most recent requests, for p50/p99 reporting."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+class MatchService:
+    """Asyncio front end that micro-batches match requests for one job database.
+
+    Requests wait in a bounded queue; a single batcher task takes the first
+    waiting request, gathers others for up to max_wait seconds (or until
+    max_batch resumes), and matches them together on one worker thread, so
+    the model never runs concurrently with itself. A full queue rejects new
+    requests with ServiceBusy instead of letting latency grow without bound.
+    The database is reopened whenever store_jobs saves a new version; a
+    sharded one is searched by one worker process per shard (see sharding).
+    """
+
+    def __init__(self, path, embeddings, max_batch=RESUME_BATCH_SIZE, max_wait=MAX_WAIT, max_queue=MAX_QUEUE):
+        self.path = path
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.latency = LatencyStats()
+        self.requests = self.rejected = self.batches = self.batched = 0
+        self._queue = None
+        self._batcher = None
+        # The model and the index are only ever used from this one thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="match-batch")
+        self._fingerprint = None
+        self._version = None
+        self._vectorstore = None
+        self._lexical = None
+        self._features = None
+        self._index_config = None
+        self._matchers = {}
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        self._batcher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_index)
+        self._executor.shutdown()
+
+    async def match(self, resume_name, resume_text, aggregation="max", nprobe=None, ef_search=None,
+                    lexical_weight=LEXICAL_WEIGHT, prefilter=True, highlight=True):
+        """Match one extracted resume; returns its result dict."""
+        results = await self.match_many(
+            [resume_name], [resume_text], aggregation, nprobe, ef_search, lexical_weight, prefilter, highlight
+        )
+        return results[0]
+
+    async def match_many(self, resume_names, resume_texts, aggregation="max", nprobe=None, ef_search=None,
+                         lexical_weight=LEXICAL_WEIGHT, prefilter=True, highlight=True):
+        """Match several resumes, which may end up in different batches.
+
+        Each result is what ResumeMatcher.match_texts returns plus 'job_scores',
+        the resume's [(job_id, score), ...] for every job it scored against,
+        and 'database_version', the database_version it was matched against.
+        With prefilter, each resume is only searched against the jobs its
+        skills and experience make plausible (see features). With
+        highlight=False top matches come back without highlighting, which the
+        caller can add with resume_matcher.highlight_match when one is shown.
+        """
+        if len(resume_names) > self.max_queue:
+            raise ValueError(f"At most {self.max_queue} resumes can be matched per request")
+        # All or nothing, so a rejected upload never leaves half its resumes queued
+        if self._queue.qsize() + len(resume_names) > self.max_queue:
+            self.rejected += len(resume_names)
+            raise ServiceBusy(f"{self._queue.qsize()} resumes already waiting to be matched")
+        loop = asyncio.get_running_loop()
+        params = (aggregation, nprobe, ef_search, lexical_weight, bool(prefilter), bool(highlight))
+        futures = []
+        for resume_name, resume_text in zip(resume_names, resume_texts):
+            future = loop.create_future()
+            self._queue.put_nowait((resume_name, resume_text, params, future, time.perf_counter()))
+            futures.append(future)
+        self.requests += len(futures)
+        return list(await asyncio.gather(*futures))
+
+    async def index_config(self):
+        """The recorded config of the database being served."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._current_config)
+
+    async def database_version(self):
+        """job_store.database_version of the database being served; every result carries the one it used."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._current_version)
+
+    def stats(self):
+        p50, p99 = self.latency.percentile(50), self.latency.percentile(99)
+        stats = {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch_size': self.batched / self.batches if self.batches else 0.0,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'p50_ms': None if p50 is None else p50 * 1000,
+            'p99_ms': None if p99 is None else p99 * 1000,
+        }
+        if hasattr(self.embeddings, "hits"):
+            stats['cache_hits'] = self.embeddings.hits
+            stats['cache_misses'] = self.embeddings.misses
+        return stats
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Requests that queued up while the last batch ran join without waiting
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batches += 1
+            self.batched += len(batch)
+            try:
+                results = await loop.run_in_executor(self._executor, self._match_batch, batch)
+            except Exception as e:
+                results = [e] * len(batch)
+            finished = time.perf_counter()
+            for (_, _, _, future, enqueued), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+                    self.latency.record(finished - enqueued)
+
+    def _open(self):
+        # Cheap stat calls; reopening only happens after store_jobs has saved
+        fingerprint = database_fingerprint(self.path)
+        if fingerprint != self._fingerprint:
+            self._close_index()
+            self._vectorstore, self._lexical, self._features = open_search_database(self.path, self.embeddings)
+            self._index_config = load_config(self.path)
+            self._matchers = {}
+            self._fingerprint = fingerprint
+            self._version = database_version(self.path)
+
+    def _close_index(self):
+        # A sharded database holds worker processes that are stopped rather than left to the garbage collector
+        close = getattr(self._vectorstore.index, "close", None) if self._vectorstore is not None else None
+        if close is not None:
+            close()
+        self._vectorstore = None
+
+    def _current_config(self):
+        self._open()
+        return dict(self._index_config)
+
+    def _current_version(self):
+        self._open()
+        return self._version
+
+    def _match_batch(self, batch):
+        self._open()
+        # Resumes asking for different settings share the embedding cache but not a search
+        groups = {}
+        for position, (_, _, params, _, _) in enumerate(batch):
+            groups.setdefault(params, []).append(position)
+
+        results = [None] * len(batch)
+        for (aggregation, nprobe, ef_search, lexical_weight, prefilter, highlight), positions in groups.items():
+            try:
+                apply_search_params(self._vectorstore.index, self._index_config, nprobe, ef_search)
+                key = (aggregation, lexical_weight, prefilter, highlight)
+                matcher = self._matchers.get(key)
+                if matcher is None:
+                    matcher = self._matchers[key] = ResumeMatcher(
+                        self._vectorstore, self.embeddings, aggregation=aggregation,
+                        lexical_index=self._lexical, lexical_weight=lexical_weight,
+                        feature_table=self._features if prefilter else None, highlight=highlight
+                    )
+                group_results, score_table = matcher.match_texts(
+                    [batch[position][0] for position in positions],
+                    [batch[position][1] for position in positions]
+                )
+            except Exception as e:
+                for position in positions:
+                    results[position] = e
+                continue
+            for i, (position, result) in enumerate(zip(positions, group_results)):
+                result['job_scores'] = score_table.jobs_for_resume(i)
+                result['database_version'] = self._version
+                results[position] = result
+        return results
+
+class ServiceThread:
+    """Runs a MatchService on its own event loop thread for synchronous callers.
+
+    Streamlit sessions and HTTP handler threads all call into the same
+    service, so their requests are batched together.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="match-service", daemon=True)
+        self._thread.start()
+        self._call(service.start())
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def match_many(self, resume_names, resume_texts, aggregation="max", nprobe=None, ef_search=None,
+                   lexical_weight=LEXICAL_WEIGHT, prefilter=True, highlight=True):
+        return self._call(self.service.match_many(
+            resume_names, resume_texts, aggregation, nprobe, ef_search, lexical_weight, prefilter, highlight
+        ))
+
+    def index_config(self):
+        return self._call(self.service.index_config())
+
+    def database_version(self):
+        return self._call(self.service.database_version())
+
+    def stats(self):
+        return self.service.stats()
+
+    def metrics(self):
+        return metrics.snapshot()
+
+    def close(self):
+        self._call(self.service.stop())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+class MatchClient:
+    """HTTP client for a running match service, with the same methods as ServiceThread."""
+
+    def __init__(self, url, timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.load(e)['error']
+            except (ValueError, KeyError):
+                message = f"{e.code} {e.reason}"
+            if e.code == 503:
+                raise ServiceBusy(message) from None
+            if e.code == 404:
+                raise FileNotFoundError(message) from None
+            if e.code == 400:
+                raise ValueError(message) from None
+            raise RuntimeError(message) from None
+
+    def match_many(self, resume_names, resume_texts, aggregation="max", nprobe=None, ef_search=None,
+                   lexical_weight=LEXICAL_WEIGHT, prefilter=True, highlight=True):
+        body = {
+            'resumes': [{'name': name, 'text': text} for name, text in zip(resume_names, resume_texts)],
+            'aggregation': aggregation,
+            'nprobe': nprobe,
+            'ef_search': ef_search,
+            'lexical_weight': lexical_weight,
+            'prefilter': prefilter,
+            'highlight': highlight,
+        }
+        return self._request("/match", body)['results']
+
+    def index_config(self):
+        return self._request("/config")
+
+    def database_version(self):
+        return self._request("/version")['database_version']
+
+    def stats(self):
+        return self._request("/stats")
+
+    def metrics(self):
+        return self._request("/metrics.json")
+
+class _HTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections as soon as a few clients arrive at once
+    request_queue_size = 128
+
+def make_server(service_thread, host="127.0.0.1", port=DEFAULT_PORT):
+    """HTTP front end: POST /match, GET /config, GET /version, GET /stats, GET /metrics (Prometheus) and /metrics.json."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, service_thread.stats())
+            elif self.path == "/metrics.json":
+                self._send(200, service_thread.metrics())
+            elif self.path == "/metrics":
+                stats = service_thread.stats()
+                gauges = {
+                    'service_queue_depth': stats['queue_depth'],
+                    'service_mean_batch_size': stats['mean_batch_size'],
+                    'service_latency_p50_seconds': None if stats['p50_ms'] is None else stats['p50_ms'] / 1000,
+                    'service_latency_p99_seconds': None if stats['p99_ms'] is None else stats['p99_ms'] / 1000,
+                    'service_rejected_requests': stats['rejected'],
+                }
+                self._send_text(200, metrics.to_prometheus(gauges))
+            elif self.path == "/config":
+                try:
+                    self._send(200, service_thread.index_config())
+                except FileNotFoundError as e:
+                    self._send(404, {'error': str(e)})
+            elif self.path == "/version":
+                try:
+                    self._send(200, {'database_version': service_thread.database_version()})
+                except FileNotFoundError as e:
+                    self._send(404, {'error': str(e)})
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/match":
+                self._send(404, {'error': f"Unknown path {self.path}"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                names = [resume['name'] for resume in request['resumes']]
+                texts = [resume['text'] for resume in request['resumes']]
+                lexical_weight = float(request.get('lexical_weight', LEXICAL_WEIGHT))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {'error': f"Malformed request: {e}"})
+                return
+            try:
+                results = service_thread.match_many(
+                    names, texts, request.get('aggregation', "max"), request.get('nprobe'), request.get('ef_search'),
+                    lexical_weight, bool(request.get('prefilter', True)), bool(request.get('highlight', True))
+                )
+            except ServiceBusy as e:
+                self._send(503, {'error': str(e)}, {'Retry-After': "1"})
+            except FileNotFoundError as e:
+                self._send(404, {'error': str(e)})
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+            else:
+                self._send(200, {'results': results})
+
+        def _send(self, status, body, headers=None):
+            self._send_text(status, result_to_json(body), headers, "application/json")
+
+        def _send_text(self, status, text, headers=None, content_type="text/plain; version=0.0.4"):
+            data = text.encode("utf-8")
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # One line per request would drown the output under load
+            pass
+
+    return _HTTPServer((host, port), Handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve resume matching over HTTP.")
+    parser.add_argument("--db", default="job_database", help="job database directory written by store_jobs.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=RESUME_BATCH_SIZE, help="resumes matched per batch")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000,
+                        help="how long a request waits for others to share its batch")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE,
+                        help="resumes allowed to wait before requests are rejected with 503")
+    args = parser.parse_args(argv)
+
+    from embedding_model import load_embedding_model
+    service = MatchService(args.db, load_embedding_model(), args.max_batch, args.max_wait_ms / 1000, args.max_queue)
+    service_thread = ServiceThread(service)
+    server = make_server(service_thread, args.host, args.port)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service_thread.close()
+        print(json.dumps(service.stats()), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import numpy as np
+import metrics
+from index_factory import filtered_search_params
+
+# Number of chunks sent to the embedding model in a single call
+EMBED_BATCH_SIZE = 64
+
+# Embed a list of texts in fixed-size batches and stack them into one float32 matrix.
+# Texts are batched in length order so each batch pads to similar lengths, and the
+# vectors are put back in input order afterwards.
+def embed_texts(embeddings, texts, batch_size=EMBED_BATCH_SIZE, sort_by_length=True):
+    order = np.argsort([len(text) for text in texts], kind="stable") if sort_by_length else np.arange(len(texts))
+    vectors = [None] * len(texts)
+    with metrics.timer("embed", items=len(texts)):
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            for position, vector in zip(batch, embeddings.embed_documents([texts[i] for i in batch])):
+                vectors[position] = vector
+    return np.asarray(vectors, dtype=np.float32)
+
+# Run one multi-query search against the FAISS index behind a LangChain vectorstore
+def search_vectors(vectorstore, vectors, k=3, params=None):
+    if len(vectors) == 0:
+        empty = np.empty((0, k))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if vectorstore._normalize_L2:
+        import faiss
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+    with metrics.timer("search", items=len(vectors)):
+        return vectorstore.index.search(vectors, k, params=params)
+
+def search_filtered(vectorstore, vectors, chunk_owner, row_filters, k=3):
+    """Search each resume's chunks only against the index rows its filter allows.
+
+    row_filters holds one boolean mask over index rows per resume, or None to
+    search every row. Resumes with the same filter share one search; resumes
+    whose filter allows nothing are not searched at all. Rows without a hit
+    come back as -1, like a search of an index with fewer than k vectors.
+    """
+    distances = np.full((len(vectors), k), np.finfo(np.float32).max, dtype=np.float32)
+    indices = np.full((len(vectors), k), -1, dtype=np.int64)
+    groups = {}
+    for owner, rows in enumerate(row_filters):
+        key = None if rows is None else np.packbits(rows, bitorder="little").tobytes()
+        groups.setdefault(key, []).append(owner)
+    for key, owners in groups.items():
+        chunk_rows = np.flatnonzero(np.isin(chunk_owner, owners))
+        if key is None:
+            params = None
+        else:
+            bitmap = np.frombuffer(key, dtype=np.uint8)
+            if not bitmap.any():
+                continue
+            params = filtered_search_params(vectorstore.index, bitmap)
+        if len(chunk_rows):
+            distances[chunk_rows], indices[chunk_rows] = search_vectors(vectorstore, vectors[chunk_rows], k, params)
+    return distances, indices
+
+def search_resume_chunks(vectorstore, embeddings, chunk_lists, k=3, batch_size=EMBED_BATCH_SIZE, row_filters=None):
+    """Embed every chunk of every resume in one batch and search them all at once.
+
+    Returns (chunk_owner, distances, indices): chunk_owner[i] is the position in
+    chunk_lists of the resume that chunk i came from, and distances/indices are
+    the (n_chunks, k) arrays returned by the FAISS index. row_filters, if
+    given, restricts each resume's search as in search_filtered.
+    """
+    all_chunks = [chunk for chunks in chunk_lists for chunk in chunks]
+    chunk_owner = np.repeat(np.arange(len(chunk_lists)), [len(chunks) for chunks in chunk_lists])
+    vectors = embed_texts(embeddings, all_chunks, batch_size)
+    if row_filters is None or all(rows is None for rows in row_filters):
+        distances, indices = search_vectors(vectorstore, vectors, k)
+    else:
+        distances, indices = search_filtered(vectorstore, vectors, chunk_owner, row_filters, k)
+    return chunk_owner, distances, indices
+
+def build_match_records(vectorstore, chunk_lists, distances, indices):
+    """Turn search results into one list of match records per resume."""
+    with metrics.timer("match_records", items=len(indices)):
+        return _build_match_records(vectorstore, chunk_lists, distances, indices)
+
+def _build_match_records(vectorstore, chunk_lists, distances, indices):
+    # Look up each job chunk once, however many resume chunks hit it
+    documents = {}
+
+    results = []
+    row = 0
+    for chunks in chunk_lists:
+        resume_matches = []
+        for chunk in chunks:
+            for distance, index in zip(distances[row], indices[row]):
+                index = int(index)
+                if index == -1:
+                    # Fewer than k job chunks in the database
+                    continue
+                if index not in documents:
+                    documents[index] = vectorstore.docstore.search(vectorstore.index_to_docstore_id[index])
+                match = documents[index]
+                # Convert distance to similarity score (0-1)
+                similarity_score = 1.0 / (1.0 + float(distance))
+                resume_matches.append({
+                    'resume_chunk': chunk,
+                    'job_chunk': match.page_content,
+                    'job_id': match.metadata['job_id'],
+                    'filename': match.metadata['filename'],
+                    'similarity': similarity_score
+                })
+            row += 1
+        results.append(resume_matches)
+    return results
+
+def match_resume_chunks(vectorstore, embeddings, chunk_lists, k=3, batch_size=EMBED_BATCH_SIZE):
+    """Match the chunks of many resumes against the job database in one batch.
+
+    chunk_lists holds one list of chunks per resume. Returns one list of match
+    records per resume, in the same order and with the same fields as calling
+    similarity_search_with_score(chunk, k) for every chunk.
+    """
+    _, distances, indices = search_resume_chunks(vectorstore, embeddings, chunk_lists, k, batch_size)
+    return build_match_records(vectorstore, chunk_lists, distances, indices)
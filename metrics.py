@@ -0,0 +1,254 @@
+"""Per-stage timers and counters for ingest and search.
+
+Every instrumented stage (extraction, splitting, embedding, index save/load,
+search, scoring, highlighting) records wall time, process CPU time and an
+item count into one registry per process:
+
+    with metrics.timer("embed", items=len(texts)):
+        ...
+
+snapshot() returns the aggregate and recent per-document stats as a dict,
+to_prometheus() renders them in the Prometheus text format, and
+serve_metrics() exposes both over HTTP (/metrics and /metrics.json). Setting
+METRICS_PORT starts that server from the Streamlit pages, and PROFILE_DIR
+makes profiled() write a cProfile dump per run.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as unknown
+    resource = None
+
+# Per-document records kept for snapshot()
+MAX_EVENTS = 1000
+
+# Prefix of every exported Prometheus metric
+PROMETHEUS_PREFIX = "resume_checker"
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class Metrics:
+    """Thread-safe aggregate of stage timings and counters."""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.events = deque(maxlen=max_events)
+
+    @contextmanager
+    def timer(self, stage, items=None, document=None):
+        """Time the block as one call of stage; set record['items'] inside to count afterwards."""
+        record = {'items': items}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            self.record(stage, time.perf_counter() - wall, time.process_time() - cpu, record['items'], document)
+
+    def record(self, stage, seconds, cpu_seconds=0.0, items=None, document=None):
+        """Add one call of stage measured elsewhere (e.g. in a worker process)."""
+        self._add(stage, seconds, cpu_seconds, items, document)
+        for run in _captures():
+            if run is not self:
+                run._add(stage, seconds, cpu_seconds, items, document)
+
+    def _add(self, stage, seconds, cpu_seconds, items, document):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {
+                'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0, 'max_seconds': 0.0
+            })
+            totals['calls'] += 1
+            totals['seconds'] += seconds
+            totals['cpu_seconds'] += cpu_seconds
+            totals['items'] += items or 0
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+            if document is not None:
+                self.events.append({
+                    'stage': stage, 'document': document, 'seconds': seconds,
+                    'cpu_seconds': cpu_seconds, 'items': items
+                })
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.events.clear()
+
+    def snapshot(self):
+        """Aggregate stats per stage (with items/sec), counters, peak RSS and recent documents."""
+        with self._lock:
+            stages = {}
+            for stage, totals in self.stages.items():
+                stages[stage] = dict(totals)
+                if totals['seconds'] > 0 and totals['items']:
+                    stages[stage]['items_per_sec'] = totals['items'] / totals['seconds']
+            return {
+                'stages': stages,
+                'counters': dict(self.counters),
+                'peak_rss_bytes': peak_rss_bytes(),
+                'documents': list(self.events),
+            }
+
+    def to_prometheus(self, gauges=None):
+        """Render the aggregate stats in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = "{" + ",".join(f'{key}="{value_}"' for key, value_ in labels.items()) + "}" if labels else ""
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}{label_text} {value}")
+
+        stages = snapshot['stages']
+        for field, kind, help_text in (
+                ('calls', "counter", "Calls of each pipeline stage."),
+                ('seconds', "counter", "Wall time spent in each pipeline stage."),
+                ('cpu_seconds', "counter", "Process CPU time spent in each pipeline stage."),
+                ('items', "counter", "Items (documents, chunks, queries) processed by each pipeline stage."),
+                ('max_seconds', "gauge", "Slowest single call of each pipeline stage.")):
+            name = f"stage_{field}" + ("_total" if kind == "counter" else "")
+            family(name, kind, help_text, [({'stage': stage}, totals[field]) for stage, totals in stages.items()])
+        for counter, value in snapshot['counters'].items():
+            family(f"{counter}_total", "counter", f"Count of {counter.replace('_', ' ')}.", [({}, value)])
+        if snapshot['peak_rss_bytes'] is not None:
+            family("peak_rss_bytes", "gauge", "Peak resident set size of this process.", [({}, snapshot['peak_rss_bytes'])])
+        for gauge, value in (gauges or {}).items():
+            if value is not None:
+                family(gauge, "gauge", gauge.replace('_', ' ').capitalize() + ".", [({}, value)])
+        return "\n".join(lines) + "\n"
+
+# One registry per process, shared by every module
+METRICS = Metrics()
+
+_local = threading.local()
+
+def _captures():
+    return getattr(_local, "captures", ())
+
+@contextmanager
+def capture():
+    """Collect, in a fresh Metrics, everything recorded on this thread inside the block.
+
+    Lets a page show the stats of the run it just did while the process-wide
+    registry keeps accumulating for export.
+    """
+    run = Metrics()
+    _local.captures = _captures() + (run,)
+    try:
+        yield run
+    finally:
+        _local.captures = tuple(c for c in _captures() if c is not run)
+
+def timer(stage, items=None, document=None):
+    return METRICS.timer(stage, items, document)
+
+def record(stage, seconds, cpu_seconds=0.0, items=None, document=None):
+    METRICS.record(stage, seconds, cpu_seconds, items, document)
+
+def count(name, value=1):
+    METRICS.count(name, value)
+
+def snapshot():
+    return METRICS.snapshot()
+
+def to_prometheus(gauges=None):
+    return METRICS.to_prometheus(gauges)
+
+@contextmanager
+def profiled(name, directory=None):
+    """Run the block under cProfile and dump the stats to directory (default: PROFILE_DIR).
+
+    Does nothing when neither is set. Only the calling thread is profiled.
+    """
+    directory = directory or os.environ.get("PROFILE_DIR")
+    if not directory:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+
+def summary_rows(snapshot):
+    """Stage rows (stage, calls, seconds, cpu, items, items/sec) of a snapshot for display, slowest first."""
+    stages = snapshot['stages']
+    return [
+        {
+            'stage': stage,
+            'calls': totals['calls'],
+            'seconds': round(totals['seconds'], 4),
+            'cpu_seconds': round(totals['cpu_seconds'], 4),
+            'items': totals['items'],
+            'items_per_sec': round(totals.get('items_per_sec', 0.0), 1),
+        }
+        for stage, totals in sorted(stages.items(), key=lambda item: item[1]['seconds'], reverse=True)
+    ]
+
+def serve_metrics(port, host="127.0.0.1", gauges=None):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; returns the server.
+
+    gauges is an optional callable returning extra {name: value} gauges at scrape time.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            extra = gauges() if gauges is not None else None
+            if self.path == "/metrics":
+                body, content_type = to_prometheus(extra), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(dict(snapshot(), gauges=extra or {})), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+_env_server = None
+_env_lock = threading.Lock()
+
+def serve_metrics_from_env():
+    """Start serve_metrics on METRICS_PORT once per process, if it is set."""
+    global _env_server
+    port = os.environ.get("METRICS_PORT")
+    with _env_lock:
+        if port and _env_server is None:
+            _env_server = serve_metrics(int(port), os.environ.get("METRICS_HOST", "127.0.0.1"))
+    return _env_server
@@ -0,0 +1,128 @@
+import io
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from pypdf import PdfReader
+import metrics
+
+# Seconds a single PDF may take before it is reported as failed
+DEFAULT_TIMEOUT = 30
+
+# Workers start from a clean server process instead of forking the caller, which under
+# Streamlit or torch is a large multithreaded process
+_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+def extract_text_from_bytes(data):
+    """Extract the text of a PDF held in memory, pages joined with spaces like PyPDFLoader."""
+    reader = PdfReader(io.BytesIO(data))
+    return " ".join(page.extract_text().strip() for page in reader.pages)
+
+class _Timeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+def _extract_worker(ticket, filename, data, timeout):
+    # Runs in a pool process, or in the caller for a single file. SIGALRM interrupts a parse
+    # that hangs so the worker is freed for the next file; where it is unavailable (or off the
+    # main thread) the parent's deadline still applies to pool workers.
+    # Timings are measured here and recorded by the parent, which owns the metrics registry.
+    use_alarm = hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        text, error = extract_text_from_bytes(data), None
+    except _Timeout:
+        text, error = None, f"timed out after {timeout}s"
+    except Exception as e:
+        text, error = None, str(e)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return ticket, filename, text, error, time.perf_counter() - wall, time.process_time() - cpu
+
+def iter_extracted_texts(items, max_workers=None, timeout=DEFAULT_TIMEOUT, max_pending=None):
+    """Extract many PDFs in a process pool, yielding (filename, text, error) as each finishes.
+
+    items is an iterable of (filename, pdf_bytes) pairs and is consumed lazily:
+    at most max_pending files (default twice the worker count) are in flight at
+    once, so a large batch never sits in memory all at the same time. Results
+    come back in completion order; text is None and error holds the reason when
+    a file could not be parsed or took longer than timeout seconds.
+
+    A batch smaller than the pool only starts as many workers as it has
+    files, and a single file is extracted in the calling process.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or max_workers * 2
+    items = iter(items)
+    # Read ahead one window of files to size the pool by what is actually there
+    first = list(itertools.islice(items, max_pending))
+    if len(first) < max_pending:
+        max_workers = min(max_workers, len(first))
+    if max_workers <= 1 and len(first) <= 1:
+        for filename, data in first:
+            _, filename, text, error, seconds, cpu_seconds = _extract_worker(0, filename, data, timeout)
+            metrics.record("extract", seconds, cpu_seconds, items=1, document=filename)
+            if error:
+                metrics.count("extract_errors")
+            yield filename, text, error
+        return
+    items = itertools.chain(first, items)
+    # A file can wait for a free worker behind up to max_pending / max_workers others
+    deadline_slack = timeout * math.ceil(max_pending / max_workers) + 1
+
+    finished = queue.Queue()
+    pending = {}
+    ticket = 0
+    exhausted = False
+
+    pool = _CONTEXT.Pool(max_workers)
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    filename, data = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pool.apply_async(_extract_worker, (ticket, filename, data, timeout), callback=finished.put)
+                pending[ticket] = (filename, time.monotonic() + deadline_slack)
+                ticket += 1
+
+            if not pending:
+                break
+
+            wait = min(deadline for _, deadline in pending.values()) - time.monotonic()
+            try:
+                done_ticket, filename, text, error, seconds, cpu_seconds = finished.get(timeout=max(wait, 0))
+            except queue.Empty:
+                now = time.monotonic()
+                for expired, (filename, deadline) in list(pending.items()):
+                    if deadline <= now:
+                        del pending[expired]
+                        metrics.count("extract_errors")
+                        yield filename, None, f"timed out after {timeout}s"
+                continue
+
+            # Results for files already reported as timed out are dropped
+            if pending.pop(done_ticket, None) is not None:
+                metrics.record("extract", seconds, cpu_seconds, items=1, document=filename)
+                if error:
+                    metrics.count("extract_errors")
+                yield filename, text, error
+    finally:
+        # Everything still running at this point is either hung or abandoned by the caller
+        pool.terminate()
+        pool.join()
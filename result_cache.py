@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+import metrics
+
+# Results kept per process, and how long one stays valid
+DEFAULT_MAX_ENTRIES = 2_000
+DEFAULT_TTL = 3600
+
+def result_key(data_hash, database_version, params):
+    """Cache key of one resume's result: its content hash, the job_store.database_version and the matching settings."""
+    return (data_hash, database_version, tuple(params))
+
+class ResultCache:
+    """In-memory LRU of finished match results with a time-to-live.
+
+    Keys come from result_key, so a result is only ever served for the same
+    resume, database version and settings it was computed with. When a new
+    database version shows up, entries of older versions are dropped at once
+    (drop_other_versions) instead of waiting to age out. Stored results are
+    shared with every caller and must not be modified.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Streamlit sessions share one cache from different threads
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                metrics.count("result_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        metrics.count("result_cache_hits")
+        return entry[1]
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_other_versions(self, database_version):
+        """Remove every entry computed against a database version other than database_version."""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] != database_version]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -4,9 +4,22 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.lib.colors import Color, black, darkblue
 from reportlab.lib.units import inch, mm
+import argparse
+import functools
+import json
+import multiprocessing
 import os
+import sys
+import time
+from collections import deque
 
-# Create a custom stylesheet
+# Documents rendered per task sent to a worker process
+RENDER_BATCH_SIZE = 32
+# Progress line printed every this many documents
+PROGRESS_EVERY = 1000
+
+# Create a custom stylesheet, once per process: every document shares it and only reads it
+@functools.lru_cache(maxsize=None)
 def getCustomStyleSheet():
     styles = getSampleStyleSheet()
     
@@ -155,13 +168,21 @@ resumes = {
         ],
         "education": "M.Tech in Artificial Intelligence, NIT, 2019"
     }
-},
+}
 
-def create_resume_pdf(filename, data):
-    """Create a PDF resume with the given data"""
+def build_pdf(filename, story):
     doc = SimpleDocTemplate(filename, pagesize=A4,
                            leftMargin=20*mm, rightMargin=20*mm,
                            topMargin=20*mm, bottomMargin=20*mm)
+    doc.build(story)
+    return filename
+
+def create_resume_pdf(filename, data):
+    """Create a PDF resume with the given data"""
+    return build_pdf(filename, resume_story(data))
+
+def resume_story(data):
+    """Flowables of a resume"""
     story = []
     
     # Get custom styles
@@ -203,22 +224,141 @@ def create_resume_pdf(filename, data):
     # Education section
     story.append(Paragraph("EDUCATION", styles["ResumeHeading"]))
     story.append(Paragraph(data["education"], styles["ResumeNormal"]))
+    return story
+
+def create_job_description_pdf(filename, data):
+    """Create a PDF job description with the given data"""
+    return build_pdf(filename, job_description_story(data))
+
+def job_description_story(data):
+    """Flowables of a job description"""
+    story = []
     
-    # Build PDF
-    doc.build(story)
-    return filename
+    # Get custom styles
+    styles = getCustomStyleSheet()
+    
+    # Title and company
+    story.append(Paragraph(f"Job Title: {data['title']}", styles["ResumeTitle"]))
+    story.append(Paragraph(f"Company: {data['company']}", styles["ResumeNormal"]))
+    story.append(Spacer(1, 10))
+    
+    # Company and role description
+    story.append(Paragraph("About Us", styles["ResumeHeading"]))
+    story.append(Paragraph(data["about"], styles["ResumeNormal"]))
+    story.append(Paragraph("Role Overview", styles["ResumeHeading"]))
+    story.append(Paragraph(data["overview"], styles["ResumeNormal"]))
+    
+    # Bulleted sections
+    story.append(Paragraph("Responsibilities", styles["ResumeHeading"]))
+    for responsibility in data["responsibilities"]:
+        story.append(Paragraph(f"- {responsibility}", styles["ResumeBullet"]))
+    story.append(Paragraph("Requirements", styles["ResumeHeading"]))
+    for requirement in data["requirements"]:
+        story.append(Paragraph(f"- {requirement}", styles["ResumeBullet"]))
+    story.append(Spacer(1, 10))
+    
+    story.append(Paragraph(f"Location: {data['location']}", styles["ResumeNormal"]))
+    story.append(Paragraph(f"Experience: {data['experience']}", styles["ResumeNormal"]))
+    return story
+
+CREATORS = {
+    'resume': create_resume_pdf,
+    'job': create_job_description_pdf,
+}
+
+def _render_batch(kind, output_dir, batch):
+    # Runs in a worker process; the stylesheet is built on its first document and reused after
+    create = CREATORS[kind]
+    return [create(os.path.join(output_dir, filename), data) for filename, data in batch]
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_create_pdfs(records, output_dir, kind="resume", processes=None, batch_size=RENDER_BATCH_SIZE):
+    """Render (filename, data) records into output_dir, yielding each PDF's path once it is written.
+
+    kind picks create_resume_pdf or create_job_description_pdf. Records are
+    consumed lazily and rendered in batches across a pool of processes (1
+    renders in this process), with at most two batches per process in
+    flight, so a stream of any length is generated in bounded memory. Paths
+    come back in input order.
+    """
+    if kind not in CREATORS:
+        raise ValueError(f"Unknown document kind {kind!r}, expected one of {tuple(CREATORS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for batch in _batches(records, batch_size):
+            yield from _render_batch(kind, output_dir, batch)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        pending = deque()
+        for batch in _batches(records, batch_size):
+            pending.append(pool.apply_async(_render_batch, (kind, output_dir, batch)))
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def iter_jsonl_records(lines, kind="resume"):
+    """(filename, data) records from JSON lines; a line's "filename" key is optional."""
+    prefix = "Resume" if kind == "resume" else "Job_Description"
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        data = json.loads(line)
+        filename = data.pop("filename", None) or f"{prefix}_{number:06d}.pdf"
+        yield filename, data
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render resume or job description PDFs.")
+    parser.add_argument("--records", default=None,
+                        help="JSONL file of document data, one object per line, or - for stdin "
+                             "(default: the built-in sample resumes)")
+    parser.add_argument("--kind", choices=tuple(CREATORS), default="resume", help="document layout")
+    parser.add_argument("--out", default="resumes", help="output directory")
+    parser.add_argument("--processes", type=int, default=None, help="rendering processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=RENDER_BATCH_SIZE, help="documents per task")
+    args = parser.parse_args(argv)
+
+    if args.records is None:
+        records = iter(resumes.items())
+        source = None
+    else:
+        source = sys.stdin if args.records == "-" else open(args.records, encoding="utf-8")
+        records = iter_jsonl_records(source, args.kind)
 
-# Create output directory if it doesn't exist
-output_dir = "resumes"
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
+    # Generate all documents
+    start = time.perf_counter()
+    count = 0
+    try:
+        for created_file in iter_create_pdfs(records, args.out, args.kind, args.processes, args.batch_size):
+            count += 1
+            if args.records is None:
+                print(f"Created: {created_file}")
+            elif count % PROGRESS_EVERY == 0:
+                print(f"{count} documents, {count / (time.perf_counter() - start):.1f} docs/sec", file=sys.stderr)
+    finally:
+        if source is not None and source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
 
-# Generate all resumes
-file_paths = []
-for filename, data in resumes.items():
-    filepath = os.path.join(output_dir, filename)
-    created_file = create_resume_pdf(filepath, data)
-    file_paths.append(created_file)
-    print(f"Created: {created_file}")
+    print(f"\nGenerated {count} documents in the '{args.out}' directory "
+          f"({elapsed:.1f} s, {count / elapsed if elapsed else 0.0:.1f} docs/sec)")
+    return 0
 
-print(f"\nGenerated {len(file_paths)} resumes in the '{output_dir}' directory")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,208 @@
+import json
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import metrics
+from features import extract_features
+from highlighting import highlight_matching_words
+from matching import EMBED_BATCH_SIZE, search_resume_chunks, build_match_records
+from pdf_extraction import DEFAULT_TIMEOUT, iter_extracted_texts
+from scoring import ScoreMatrix, job_index, reciprocal_rank_fusion
+
+# Resumes are split into larger chunks than job descriptions
+RESUME_CHUNK_SIZE = 500
+RESUME_CHUNK_OVERLAP = 100
+
+# Job chunks retrieved per resume chunk
+MATCHES_PER_CHUNK = 3
+# Matches at or below this similarity are treated as noise
+MIN_SIMILARITY = 0.3
+# Matches shown (and highlighted) per resume
+TOP_MATCHES = 5
+# Best fitting jobs reported per resume
+BEST_JOBS = 3
+# Share of the job ranking decided by BM25 keyword scores rather than embeddings (0 to 1)
+LEXICAL_WEIGHT = 0.3
+# Pre-filter: skills a job must share with a resume to be searched, and years of
+# experience a job may ask for beyond what the resume claims
+MIN_SHARED_SKILLS = 1
+YEARS_SLACK = 2
+
+# Resumes matched together in one embedding/search batch when streaming
+RESUME_BATCH_SIZE = 32
+
+def highlight_match(match):
+    """Add highlighted_job, highlighted_resume, common_words and common_phrases to one match record."""
+    highlighted_job, highlighted_resume, common_words, common_phrases = highlight_matching_words(
+        match['job_chunk'], match['resume_chunk']
+    )
+    match['highlighted_job'] = highlighted_job
+    match['highlighted_resume'] = highlighted_resume
+    match['common_words'] = common_words
+    match['common_phrases'] = common_phrases
+    return match
+
+def build_resume_result(resume_name, resume_matches, best_jobs, highlight=True):
+    """Summarize one resume's match records into the result shown for it.
+
+    With highlight=False the top matches are left without highlighting, for
+    callers that only highlight the matches a user actually opens.
+    """
+    # Calculate overall match score for this resume
+    if resume_matches:
+        avg_similarity = sum(match['similarity'] for match in resume_matches) / len(resume_matches)
+        match_percentage = float(avg_similarity * 100)
+
+        # Filter out very weak matches (below threshold)
+        good_matches = [match for match in resume_matches if match['similarity'] > MIN_SIMILARITY]
+
+        if good_matches:
+            # Get top matching chunks for display
+            top_matches = sorted(good_matches, key=lambda x: x['similarity'], reverse=True)[:TOP_MATCHES]
+
+            # Add highlighted text to each match
+            if highlight:
+                with metrics.timer("highlight", items=len(top_matches), document=resume_name):
+                    for match in top_matches:
+                        highlight_match(match)
+
+            return {
+                'resume_name': resume_name,
+                'score': match_percentage,
+                'top_matches': top_matches,
+                'total_matches': len(good_matches),
+                'has_good_matches': True,
+                'best_jobs': best_jobs
+            }
+
+    return {
+        'resume_name': resume_name,
+        'score': 0.0,
+        'top_matches': [],
+        'total_matches': 0,
+        'has_good_matches': False,
+        'best_jobs': best_jobs
+    }
+
+def result_to_json(result):
+    """Serialize a result as one JSON line (sets become sorted lists)."""
+    return json.dumps(result, default=sorted, ensure_ascii=False)
+
+class ResumeMatcher:
+    """Matches resumes against a loaded job database, independent of any UI."""
+
+    def __init__(self, vectorstore, embeddings, aggregation="max", batch_size=EMBED_BATCH_SIZE,
+                 lexical_index=None, lexical_weight=LEXICAL_WEIGHT, feature_table=None, highlight=True):
+        if not 0 <= lexical_weight <= 1:
+            raise ValueError(f"lexical_weight must be between 0 and 1, got {lexical_weight}")
+        self.vectorstore = vectorstore
+        self.embeddings = embeddings
+        self.aggregation = aggregation
+        self.batch_size = batch_size
+        # Bm25Index over the same rows as the vectorstore, or None to rank by embeddings alone
+        self.lexical_index = lexical_index
+        self.lexical_weight = lexical_weight
+        # features.FeatureTable of the same database, or None to search every job for every resume
+        self.feature_table = feature_table
+        # False leaves highlighting of top matches to the caller (see highlight_match)
+        self.highlight = highlight
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=RESUME_CHUNK_SIZE,
+            chunk_overlap=RESUME_CHUNK_OVERLAP
+        )
+        self.job_ids, self.row_to_job = job_index(vectorstore)
+        if feature_table is not None:
+            # Column of each job in the feature table; jobs it does not know are never filtered out
+            positions = {job_id: position for position, job_id in enumerate(feature_table.job_ids)}
+            self._feature_rows = np.array([positions.get(job_id, -1) for job_id in self.job_ids], dtype=np.int64)
+
+    def candidate_jobs(self, resume_texts):
+        """(n_resumes, n_jobs) mask of the jobs each resume is searched against."""
+        masks = np.ones((len(resume_texts), len(self.job_ids)), dtype=bool)
+        if self.feature_table is None:
+            return masks
+        known = self._feature_rows >= 0
+        for position, resume_text in enumerate(resume_texts):
+            keep = self.feature_table.candidate_jobs(extract_features(resume_text), MIN_SHARED_SKILLS, YEARS_SLACK)
+            masks[position, known] = keep[self._feature_rows[known]]
+        return masks
+
+    def match_texts(self, resume_names, resume_texts):
+        """Match a batch of extracted resume texts.
+
+        Returns (results, score_table): one result per resume in input order, and
+        the ScoreMatrix of every resume against every job.
+        """
+        chunk_lists = []
+        for resume_name, resume_text in zip(resume_names, resume_texts):
+            with metrics.timer("split", document=resume_name) as timing:
+                chunk_lists.append(self.text_splitter.split_text(resume_text))
+                timing['items'] = len(chunk_lists[-1])
+
+        # Narrow each resume down to plausible jobs before any vector search
+        job_masks = row_filters = None
+        if self.feature_table is not None:
+            with metrics.timer("prefilter", items=len(resume_names)):
+                job_masks = self.candidate_jobs(resume_texts)
+                row_filters = [None if mask.all() else mask[self.row_to_job] for mask in job_masks]
+            metrics.count("prefilter_jobs_total", job_masks.size)
+            metrics.count("prefilter_jobs_kept", int(job_masks.sum()))
+
+        # For each resume chunk, find matching job description chunks
+        chunk_owner, distances, indices = search_resume_chunks(
+            self.vectorstore, self.embeddings, chunk_lists, k=MATCHES_PER_CHUNK, batch_size=self.batch_size,
+            row_filters=row_filters
+        )
+        all_matches = build_match_records(self.vectorstore, chunk_lists, distances, indices)
+
+        lexical_scores = None
+        if self.lexical_index is not None and self.lexical_weight > 0:
+            # One postings pass per resume, over its whole text rather than its chunks
+            with metrics.timer("lexical_score", items=len(resume_names)):
+                lexical_scores = self.lexical_index.score_jobs(resume_texts, self.row_to_job, len(self.job_ids))
+                if job_masks is not None:
+                    lexical_scores[~job_masks] = 0.0
+
+        # Score every resume against every job in one matrix pass
+        with metrics.timer("score", items=len(resume_names)):
+            score_table = ScoreMatrix.from_search(
+                resume_names, self.job_ids, self.row_to_job, chunk_owner, distances, indices,
+                method=self.aggregation, top_k=MATCHES_PER_CHUNK
+            )
+            fused = None
+            if lexical_scores is not None:
+                # Fused by rank, since BM25 and similarity scores are not on comparable scales. Ranks
+                # only compare jobs within one resume, so they order best_jobs while the table (and
+                # every ranking of resumes per job) keeps the similarity scores
+                fused = reciprocal_rank_fusion(
+                    [score_table.scores, lexical_scores], [1 - self.lexical_weight, self.lexical_weight]
+                )
+            best_jobs = score_table.ranked_jobs(limit=BEST_JOBS, order_by=fused)
+
+        results = [
+            build_resume_result(resume_name, resume_matches, resume_jobs, self.highlight)
+            for resume_name, resume_matches, resume_jobs in zip(resume_names, all_matches, best_jobs)
+        ]
+        return results, score_table
+
+    def iter_results(self, uploads, resume_batch_size=RESUME_BATCH_SIZE, max_workers=None, timeout=DEFAULT_TIMEOUT):
+        """Stream results for (filename, pdf_bytes) pairs as each batch of resumes completes.
+
+        Only resume_batch_size extracted resumes are held at a time, so memory
+        stays flat however many files uploads yields. Files that cannot be read
+        yield {'resume_name': ..., 'error': ...} instead of a result.
+        """
+        names = []
+        texts = []
+        for resume_name, resume_text, error in iter_extracted_texts(uploads, max_workers, timeout):
+            if error:
+                yield {'resume_name': resume_name, 'error': error}
+                continue
+            if not resume_text:
+                continue
+            names.append(resume_name)
+            texts.append(resume_text)
+            if len(names) >= resume_batch_size:
+                yield from self.match_texts(names, texts)[0]
+                names, texts = [], []
+        if names:
+            yield from self.match_texts(names, texts)[0]
@@ -0,0 +1,156 @@
+import numpy as np
+
+# Ways of collapsing the chunk similarities of one (resume, job) pair into a single score
+AGGREGATIONS = ("max", "mean", "topk")
+
+# Reciprocal rank fusion damping: a job's contribution from one ranking is weight / (RRF_K + rank)
+RRF_K = 60
+
+def job_index(vectorstore):
+    """Map every row of the FAISS index to an integer job index.
+
+    Returns (job_ids, row_to_job) where job_ids[row_to_job[row]] is the job_id
+    that store_jobs recorded in the metadata of that row's chunk.
+    """
+    row_job_index = getattr(vectorstore.docstore, "row_job_index", None)
+    if row_job_index is not None:
+        # Stores that keep jobs as integers already have the mapping
+        return row_job_index()
+    labels = (
+        (row, vectorstore.docstore.search(doc_id).metadata['job_id'])
+        for row, doc_id in vectorstore.index_to_docstore_id.items()
+    )
+
+    job_ids = []
+    positions = {}
+    row_to_job = np.empty(vectorstore.index.ntotal, dtype=np.int64)
+    for row, job_id in labels:
+        if job_id not in positions:
+            positions[job_id] = len(job_ids)
+            job_ids.append(job_id)
+        row_to_job[row] = positions[job_id]
+    return job_ids, row_to_job
+
+def score_matrix(chunk_owner, distances, indices, row_to_job, n_resumes, n_jobs, method="max", top_k=3):
+    """Aggregate chunk hits into a dense (n_resumes, n_jobs) similarity matrix.
+
+    chunk_owner, distances and indices are what matching.search_resume_chunks
+    returns. Each hit contributes the same 1 / (1 + distance) similarity that
+    search_resumes displays; pairs without any hit score 0. method is "max",
+    "mean", or "topk" (mean of the top_k best chunk similarities).
+    """
+    if method not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {method!r}, expected one of {AGGREGATIONS}")
+
+    scores = np.zeros(n_resumes * n_jobs, dtype=np.float64)
+    hit = indices >= 0
+    if not hit.any():
+        return scores.reshape(n_resumes, n_jobs)
+
+    similarity = 1.0 / (1.0 + distances[hit].astype(np.float64))
+    owner = np.broadcast_to(chunk_owner[:, None], indices.shape)[hit]
+    cell = owner * n_jobs + row_to_job[indices[hit]]
+
+    if method == "mean":
+        counts = np.bincount(cell, minlength=scores.size)
+        totals = np.bincount(cell, weights=similarity, minlength=scores.size)
+        np.divide(totals, counts, out=scores, where=counts > 0)
+        return scores.reshape(n_resumes, n_jobs)
+
+    # Sort hits by cell, best similarity first, and rank them within each cell
+    order = np.lexsort((-similarity, cell))
+    cell = cell[order]
+    similarity = similarity[order]
+    group_start = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+    rank = np.arange(cell.size) - np.repeat(group_start, np.diff(np.r_[group_start, cell.size]))
+
+    if method == "max":
+        scores[cell[group_start]] = similarity[group_start]
+    else:
+        keep = rank < top_k
+        counts = np.bincount(cell[keep], minlength=scores.size)
+        totals = np.bincount(cell[keep], weights=similarity[keep], minlength=scores.size)
+        np.divide(totals, counts, out=scores, where=counts > 0)
+    return scores.reshape(n_resumes, n_jobs)
+
+def reciprocal_rank_fusion(score_matrices, weights, k=RRF_K):
+    """Fuse several (n_resumes, n_jobs) score matrices by the rank each gives every job.
+
+    For each resume, a job ranked r-th (from 1) by a matrix gains weight / (k + r)
+    from it; jobs a matrix scores 0 gain nothing from that matrix. The result
+    is scaled so a job ranked first by every weighted matrix scores 1.
+    """
+    fused = np.zeros(score_matrices[0].shape, dtype=np.float64)
+    for scores, weight in zip(score_matrices, weights):
+        if weight <= 0:
+            continue
+        order = np.argsort(-scores, axis=1, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, scores.shape[1] + 1), axis=1)
+        fused += np.where(scores > 0, weight / (k + ranks), 0.0)
+    total = sum(weight for weight in weights if weight > 0)
+    return fused * (k + 1) / total if total else fused
+
+class ScoreMatrix:
+    """Resume x job score table with rankings along either axis."""
+
+    def __init__(self, resume_names, job_ids, scores):
+        self.resume_names = list(resume_names)
+        self.job_ids = list(job_ids)
+        self.scores = scores
+
+    @classmethod
+    def from_search(cls, resume_names, job_ids, row_to_job, chunk_owner, distances, indices, method="max", top_k=3):
+        scores = score_matrix(chunk_owner, distances, indices, row_to_job,
+                              len(resume_names), len(job_ids), method, top_k)
+        return cls(resume_names, job_ids, scores)
+
+    @classmethod
+    def from_job_scores(cls, resume_names, job_scores):
+        """Rebuild a table from one [(job_id, score), ...] list per resume, as the match service returns."""
+        job_ids = list(dict.fromkeys(job_id for row in job_scores for job_id, _ in row))
+        positions = {job_id: j for j, job_id in enumerate(job_ids)}
+        scores = np.zeros((len(resume_names), len(job_ids)), dtype=np.float64)
+        for r, row in enumerate(job_scores):
+            for job_id, score in row:
+                scores[r, positions[job_id]] = score
+        return cls(resume_names, job_ids, scores)
+
+    def _ranked(self, values, order, labels, limit, ranking=None):
+        # Entries the ranking scores 0 are left out; by default the ranking is the values themselves
+        ranking = values if ranking is None else ranking
+        order = order[ranking[order] > 0]
+        if limit is not None:
+            order = order[:limit]
+        return [(labels[i], float(values[i])) for i in order]
+
+    def candidates_for_job(self, job_id, limit=None):
+        """Resumes ranked by score for one job, best first, as (resume_name, score)."""
+        values = self.scores[:, self.job_ids.index(job_id)]
+        return self._ranked(values, np.argsort(-values, kind="stable"), self.resume_names, limit)
+
+    def jobs_for_resume(self, position, limit=None):
+        """Jobs ranked by score for the resume at position, best first, as (job_id, score)."""
+        values = self.scores[position]
+        return self._ranked(values, np.argsort(-values, kind="stable"), self.job_ids, limit)
+
+    def ranked_candidates(self, limit=None):
+        """{job_id: [(resume_name, score), ...]} for every job."""
+        order = np.argsort(-self.scores, axis=0, kind="stable")
+        return {
+            job_id: self._ranked(self.scores[:, j], order[:, j], self.resume_names, limit)
+            for j, job_id in enumerate(self.job_ids)
+        }
+
+    def ranked_jobs(self, limit=None, order_by=None):
+        """One [(job_id, score), ...] list per resume, in resume order.
+
+        order_by, an array shaped like scores (e.g. reciprocal_rank_fusion
+        output), sets the order of each resume's jobs and which of them are
+        listed, so a job only it scores is kept; the scores reported are still
+        this table's.
+        """
+        ranking = self.scores if order_by is None else order_by
+        order = np.argsort(-ranking, axis=1, kind="stable")
+        return [self._ranked(self.scores[r], order[r], self.job_ids, limit, ranking[r])
+                for r in range(len(self.resume_names))]
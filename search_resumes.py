@@ -1,218 +1,307 @@
 import streamlit as st
 import os
-import re
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from tempfile import NamedTemporaryFile
-from difflib import SequenceMatcher
+import metrics
+from highlighting import highlight_matching_words
+from job_store import content_hash
+from pdf_extraction import iter_extracted_texts
+from result_cache import ResultCache, result_key
+from scoring import AGGREGATIONS, ScoreMatrix
+from match_service import MatchClient, MatchService, ServiceBusy, ServiceThread
+from resume_matcher import LEXICAL_WEIGHT, RESUME_BATCH_SIZE
 
 # Set up the page
 st.set_page_config(page_title="Resume Matcher", layout="wide")
 st.title("🔍 Resume Matcher")
 st.markdown("Upload resumes to find matching job descriptions")
 
-# Initialize the embedding model
+# Prometheus/JSON stats on METRICS_PORT, if set
+metrics.serve_metrics_from_env()
+
+# Summary rows shown per page of results
+PAGE_SIZES = [10, 25, 50, 100]
+
+# One match service per process, shared by every session so concurrent users are batched together.
+# With MATCH_SERVICE_URL set this page is only a client of a service started by match_service.py.
 @st.cache_resource
-def load_embedding_model():
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    return HuggingFaceEmbeddings(model_name=model_name)
+def get_match_service():
+    url = os.environ.get("MATCH_SERVICE_URL")
+    if url:
+        return MatchClient(url)
+    from embedding_model import load_embedding_model
+    return ServiceThread(MatchService("job_database", load_embedding_model()))
 
-embeddings = load_embedding_model()
+# Finished results of every session in this process, so re-running an upload only matches what is new
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
 
-# Function to process PDF and extract text
-def extract_text_from_pdf(pdf_file):
-    try:
-        with NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_file.getvalue())
-            tmp_file_path = tmp_file.name
-        
-        loader = PyPDFLoader(tmp_file_path)
-        documents = loader.load()
-        os.unlink(tmp_file_path)
+# Extraction timings of this run, and the match service's totals across all users
+def show_timings(run, match_service):
+    with st.expander("⏱️ Timings"):
+        snapshot = run.snapshot()
+        st.table(metrics.summary_rows(snapshot))
+        if snapshot['documents']:
+            st.dataframe(snapshot['documents'])
+        service_metrics = match_service.metrics()
+        st.markdown("**Match service (all requests so far)**")
+        st.table(metrics.summary_rows(service_metrics))
+        if service_metrics['peak_rss_bytes'] is not None:
+            st.caption(f"Peak memory of the match service: {service_metrics['peak_rss_bytes'] / 2 ** 20:.0f} MB")
+
+# Highlighting of one job/resume chunk pair, computed the first time a resume is opened
+@st.cache_data(max_entries=5000, show_spinner=False)
+def highlight_pair(job_chunk, resume_chunk):
+    with metrics.timer("highlight", items=1):
+        return highlight_matching_words(job_chunk, resume_chunk)
+
+# Sorting and filtering run here, so only one page of summary rows is sent to the browser
+def select_results(results, sort_by, min_score, name_filter):
+    selected = [
+        result for result in results
+        if result['score'] >= min_score and name_filter.lower() in result['resume_name'].lower()
+    ]
+    if sort_by == "Score (high to low)":
+        selected.sort(key=lambda result: result['score'], reverse=True)
+    elif sort_by == "Score (low to high)":
+        selected.sort(key=lambda result: result['score'])
+    else:
+        selected.sort(key=lambda result: result['resume_name'].lower())
+    return selected
+
+def summary_row(rank, result):
+    best_job = result['best_jobs'][0] if result['best_jobs'] else None
+    return {
+        'rank': rank,
+        'resume': result['resume_name'],
+        'score (%)': round(result['score'], 2),
+        'matches': result['total_matches'],
+        'best job': best_job[0] if best_job else "",
+        'best job score (%)': round(best_job[1] * 100, 1) if best_job else None,
+    }
+
+# Full match details of one resume, only rendered for the resume that is opened
+def show_result_details(result):
+    if not result['has_good_matches']:
+        st.warning("This resume doesn't match any job requirements well.")
+        return
+    progress_value = float(min(max(result['score']/100, 0.0), 1.0))
+    st.progress(progress_value)
+    
+    if result['best_jobs']:
+        best_jobs_text = ', '.join(f"**{job_id}** ({score * 100:.1f}%)" for job_id, score in result['best_jobs'])
+        st.markdown(f"**Best fitting jobs:** {best_jobs_text}")
+    
+    st.subheader("🔍 Top Matching Sections")
+    
+    for i, match in enumerate(result['top_matches'], 1):
+        if 'highlighted_job' not in match:
+            highlighted_job, highlighted_resume, common_words, common_phrases = highlight_pair(
+                match['job_chunk'], match['resume_chunk']
+            )
+            # A copy, since results are shared with the result cache
+            match = dict(match, highlighted_job=highlighted_job, highlighted_resume=highlighted_resume,
+                         common_words=common_words, common_phrases=common_phrases)
+        match_container = st.container()
         
-        full_text = " ".join([doc.page_content for doc in documents])
-        return full_text
-    except Exception as e:
-        st.error(f"Error processing {pdf_file.name}: {str(e)}")
-        return None
+        with match_container:
+            st.markdown(f"### 🎯 Match #{i} → **{match['filename']}** (Similarity: `{match['similarity']:.3f}`)")
+            
+            # Show common words and phrases
+            if match['common_words'] or match['common_phrases']:
+                st.markdown("#### 🎯 Why This Match Happened:")
+                if match['common_words']:
+                    st.markdown(f"**Common Keywords:** `{', '.join(sorted(match['common_words']))}`")
+                if match['common_phrases']:
+                    st.markdown(f"**Common Phrases:** `{' | '.join(match['common_phrases'])}`")
+                st.markdown("---")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### 📋 Job Description Content")
+                # Use markdown to render highlighted text
+                st.markdown(match['highlighted_job'], unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown("#### 📄 Resume Content")
+                st.markdown(match['highlighted_resume'], unsafe_allow_html=True)
+            
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.markdown("---")
+            st.markdown("<br>", unsafe_allow_html=True)
 
-# Function to highlight matching words between two texts
-def highlight_matching_words(text1, text2):
-    # Convert to lowercase for case-insensitive matching
-    text1_lower = text1.lower()
-    text2_lower = text2.lower()
-    
-    # Find common words (more than 3 characters to avoid common words)
-    words1 = set(re.findall(r'\b\w{4,}\b', text1_lower))
-    words2 = set(re.findall(r'\b\w{4,}\b', text2_lower))
-    common_words = words1.intersection(words2)
-    
-    # Also find common phrases using sequence matching
-    matcher = SequenceMatcher(None, text1_lower, text2_lower)
-    common_phrases = []
-    for match in matcher.get_matching_blocks():
-        if match.size > 10:  # Only consider phrases longer than 10 characters
-            phrase = text1[match.a:match.a + match.size]
-            common_phrases.append(phrase)
-    
-    # Highlight common words in the original text
-    highlighted_text1 = text1
-    highlighted_text2 = text2
-    
-    # Highlight words
-    for word in common_words:
-        pattern = re.compile(re.escape(word), re.IGNORECASE)
-        highlighted_text1 = pattern.sub(f"**{word}**", highlighted_text1)
-        highlighted_text2 = pattern.sub(f"**{word}**", highlighted_text2)
-    
-    # Highlight phrases
-    for phrase in common_phrases:
-        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-        highlighted_text1 = pattern.sub(f"<mark>{phrase}</mark>", highlighted_text1)
-        highlighted_text2 = pattern.sub(f"<mark>{phrase}</mark>", highlighted_text2)
-    
-    return highlighted_text1, highlighted_text2, common_words, common_phrases
+# Summary table of one page of results; details are rendered for the opened resume only
+def show_results(match_run):
+    results = match_run['results']
+    stats = match_run['stats']
+    
+    # Display results
+    st.subheader("🎯 Matching Results")
+    if stats['p50_ms'] is not None:
+        st.caption(f"Match service: p50 {stats['p50_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms, "
+                   f"{stats['mean_batch_size']:.1f} resumes per batch")
+    if 'cache_hits' in stats:
+        st.caption(f"Embedding cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+    
+    if not any(result['has_good_matches'] for result in results):
+        st.warning("❌ No strong matches found. The resumes don't match the job requirements well.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", ["Score (high to low)", "Score (low to high)", "Resume name"])
+    with col2:
+        min_score = st.slider("Minimum score (%)", 0.0, 100.0, 0.0, 1.0)
+    with col3:
+        name_filter = st.text_input("Resume name contains")
+    with col4:
+        page_size = st.selectbox("Resumes per page", PAGE_SIZES, index=1)
+    
+    selected = select_results(results, sort_by, min_score, name_filter)
+    if not selected:
+        st.info("No resumes match the filter.")
+        return
+    pages = (len(selected) + page_size - 1) // page_size
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+    start = (page - 1) * page_size
+    page_results = selected[start:start + page_size]
+    
+    st.caption(f"Showing {start + 1}–{start + len(page_results)} of {len(selected)} resumes ({len(results)} matched)")
+    st.dataframe([summary_row(rank, result) for rank, result in enumerate(page_results, start + 1)],
+                 hide_index=True)
+    
+    opened = st.selectbox(
+        "Show matching sections for",
+        [None] + list(range(len(page_results))),
+        format_func=lambda position: "—" if position is None else
+            f"#{start + position + 1}: {page_results[position]['resume_name']} ({page_results[position]['score']:.2f}%)"
+    )
+    if opened is not None:
+        show_result_details(page_results[opened])
+    
+    # Ranked candidates for every job in the database
+    with st.expander("👥 Top Candidates per Job"):
+        for job_id, candidates in match_run['score_table'].ranked_candidates(limit=5).items():
+            if candidates:
+                candidates_text = ', '.join(f"{resume_name} ({score * 100:.1f}%)" for resume_name, score in candidates)
+                st.markdown(f"**{job_id}:** {candidates_text}")
 
 def main():
-    # Check if database exists
-    if not os.path.exists("job_database"):
-        st.error("❌ No job database found! Please run 'store_jobs.py' first to create a database.")
-        return
+    match_service = get_match_service()
     
-    # Load the FAISS database
+    # Check if database exists
     with st.spinner("Loading job database..."):
-        vectorstore = FAISS.load_local("job_database", embeddings, allow_dangerous_deserialization=True)
+        try:
+            index_config = match_service.index_config()
+        except FileNotFoundError as e:
+            st.error(f"❌ {e}")
+            return
+        except OSError as e:
+            st.error(f"❌ Could not reach the match service: {e}")
+            return
     
     st.success(f"✅ Loaded job database successfully!")
     
+    # Query-time knobs for approximate indexes
+    nprobe = ef_search = None
+    if index_config['type'] in ("ivf", "ivfpq"):
+        nprobe = st.sidebar.slider("IVF lists probed (nprobe)", 1, 256, index_config['nprobe'],
+                                   help="Higher finds more true neighbours but searches more of the index.")
+    elif index_config['type'] == "hnsw":
+        ef_search = st.sidebar.slider("HNSW search breadth (efSearch)", 16, 512, index_config['ef_search'],
+                                      help="Higher finds more true neighbours but visits more of the graph.")
+    
+    # How chunk similarities are combined into one resume × job score
+    aggregation = st.sidebar.selectbox(
+        "Job score aggregation",
+        AGGREGATIONS,
+        format_func=lambda method: {'max': "Best chunk", 'mean': "Mean of chunks", 'topk': "Mean of top 3 chunks"}[method]
+    )
+    
+    # How much exact keyword overlap (BM25) counts next to embedding similarity when ranking jobs
+    lexical_weight = st.sidebar.slider(
+        "Keyword weight", 0.0, 1.0, LEXICAL_WEIGHT, 0.05,
+        help="0 ranks jobs by embedding similarity only, 1 by keyword (BM25) scores only."
+    )
+    
+    # Skip jobs that share no skills with a resume, or ask for far more experience, before searching
+    prefilter = st.sidebar.checkbox(
+        "Pre-filter jobs by skills and experience", value=True,
+        help="Only compare each resume with job descriptions that share at least one skill with it."
+    )
+    
     # Upload resumes
     st.subheader("📄 Upload Resumes")
     resume_files = st.file_uploader("Upload Resume PDFs", type='pdf', accept_multiple_files=True)
     
+    run = None
     if resume_files and st.button("Find Matching Jobs"):
-        with st.spinner("Analyzing resumes..."):
+        with st.spinner("Analyzing resumes..."), metrics.capture() as run, metrics.profiled("search_resumes"):
+            # Resumes already matched against this version of the database with these settings are not extracted again
+            result_cache = get_result_cache()
+            database_version = match_service.database_version()
+            result_cache.drop_other_versions(database_version)
+            # Results come back unhighlighted; only the resume a user opens below is highlighted
+            params = (aggregation, nprobe, ef_search, lexical_weight, prefilter, False)
             results = []
+            # Uploads still to match, by position, as (filename, content hash); filenames need not be unique
+            pending = {}
+            to_extract = []
+            for position, resume_file in enumerate(resume_files):
+                data = resume_file.getvalue()
+                data_hash = content_hash(data)
+                cached = result_cache.get(result_key(data_hash, database_version, params))
+                if cached is not None:
+                    # The same bytes may have been matched under another filename
+                    results.append(dict(cached, resume_name=resume_file.name))
+                else:
+                    pending[str(position)] = (resume_file.name, data_hash)
+                    to_extract.append((str(position), data))
             
-            for resume_file in resume_files:
-                resume_text = extract_text_from_pdf(resume_file)
-                if resume_text:
-                    # Split resume into chunks
-                    text_splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=500, 
-                        chunk_overlap=100
-                    )
-                    resume_chunks = text_splitter.split_text(resume_text)
-                    
-                    # For each resume chunk, find matching job description chunks
-                    resume_matches = []
-                    for chunk in resume_chunks:
-                        matches = vectorstore.similarity_search_with_score(chunk, k=3)
-                        for match, score in matches:
-                            # Convert distance to similarity score (0-1)
-                            similarity_score = 1.0 / (1.0 + float(score))
-                            resume_matches.append({
-                                'resume_chunk': chunk,
-                                'job_chunk': match.page_content,
-                                'job_id': match.metadata['job_id'],
-                                'filename': match.metadata['filename'],
-                                'similarity': similarity_score
-                            })
-                    
-                    # Calculate overall match score for this resume
-                    if resume_matches:
-                        avg_similarity = sum(match['similarity'] for match in resume_matches) / len(resume_matches)
-                        match_percentage = float(avg_similarity * 100)
-                        
-                        # Filter out very weak matches (below threshold)
-                        good_matches = [match for match in resume_matches if match['similarity'] > 0.3]
-                        
-                        if good_matches:
-                            # Get top matching chunks for display
-                            top_matches = sorted(good_matches, key=lambda x: x['similarity'], reverse=True)[:5]
-                            
-                            # Add highlighted text to each match
-                            for match in top_matches:
-                                highlighted_job, highlighted_resume, common_words, common_phrases = highlight_matching_words(
-                                    match['job_chunk'], match['resume_chunk']
-                                )
-                                match['highlighted_job'] = highlighted_job
-                                match['highlighted_resume'] = highlighted_resume
-                                match['common_words'] = common_words
-                                match['common_phrases'] = common_phrases
-                            
-                            results.append({
-                                'resume_name': resume_file.name,
-                                'score': match_percentage,
-                                'top_matches': top_matches,
-                                'total_matches': len(good_matches),
-                                'has_good_matches': True
-                            })
-                        else:
-                            results.append({
-                                'resume_name': resume_file.name,
-                                'score': 0.0,
-                                'top_matches': [],
-                                'total_matches': 0,
-                                'has_good_matches': False
-                            })
-                    else:
-                        results.append({
-                            'resume_name': resume_file.name,
-                            'score': 0.0,
-                            'top_matches': [],
-                            'total_matches': 0,
-                            'has_good_matches': False
-                        })
-            
-            # Display results
-            st.subheader("🎯 Matching Results")
+            # Extract every new resume first so their chunks are embedded together
+            resume_names = []
+            resume_texts = []
+            resume_hashes = []
+            for position, resume_text, error in iter_extracted_texts(to_extract):
+                resume_name, data_hash = pending[position]
+                if error:
+                    st.error(f"Error processing {resume_name}: {error}")
+                elif resume_text:
+                    resume_names.append(resume_name)
+                    resume_texts.append(resume_text)
+                    resume_hashes.append(data_hash)
             
-            if not any(result['has_good_matches'] for result in results):
-                st.warning("❌ No strong matches found. The resumes don't match the job requirements well.")
+            # Sent a batch at a time so one large upload cannot fill the service queue by itself
+            try:
+                with metrics.timer("match_request", items=len(resume_names)):
+                    for start in range(0, len(resume_names), RESUME_BATCH_SIZE):
+                        batch = match_service.match_many(
+                            resume_names[start:start + RESUME_BATCH_SIZE], resume_texts[start:start + RESUME_BATCH_SIZE],
+                            aggregation, nprobe, ef_search, lexical_weight, prefilter, highlight=False
+                        )
+                        for result, data_hash in zip(batch, resume_hashes[start:start + RESUME_BATCH_SIZE]):
+                            # Keyed by the version the service actually matched against, in case store_jobs saved meanwhile
+                            result_cache.put(result_key(data_hash, result['database_version'], params), result)
+                        results.extend(batch)
+            except ServiceBusy:
+                st.error("❌ The match service is busy with other requests. Please try again in a moment.")
                 return
+            if len(results) > len(resume_names):
+                st.caption(f"Result cache: {len(results) - len(resume_names)} of {len(results)} resumes reused from earlier runs")
+            score_table = ScoreMatrix.from_job_scores([result['resume_name'] for result in results], [result['job_scores'] for result in results])
             
-            for rank, result in enumerate(results, 1):
-                if result['has_good_matches']:
-                    with st.expander(f"#{rank}: {result['resume_name']} - Match: {result['score']:.2f}% ({result['total_matches']} matches)", expanded=True):
-                        progress_value = float(min(max(result['score']/100, 0.0), 1.0))
-                        st.progress(progress_value)
-                        
-                        st.subheader("🔍 Top Matching Sections")
-                        
-                        for i, match in enumerate(result['top_matches'], 1):
-                            match_container = st.container()
-                            
-                            with match_container:
-                                st.markdown(f"### 🎯 Match #{i} → **{match['filename']}** (Similarity: `{match['similarity']:.3f}`)")
-                                
-                                # Show common words and phrases
-                                if match['common_words'] or match['common_phrases']:
-                                    st.markdown("#### 🎯 Why This Match Happened:")
-                                    if match['common_words']:
-                                        st.markdown(f"**Common Keywords:** `{', '.join(sorted(match['common_words']))}`")
-                                    if match['common_phrases']:
-                                        st.markdown(f"**Common Phrases:** `{' | '.join(match['common_phrases'])}`")
-                                    st.markdown("---")
-                                
-                                col1, col2 = st.columns(2)
-                                
-                                with col1:
-                                    st.markdown("#### 📋 Job Description Content")
-                                    # Use markdown to render highlighted text
-                                    st.markdown(match['highlighted_job'], unsafe_allow_html=True)
-                                
-                                with col2:
-                                    st.markdown("#### 📄 Resume Content")
-                                    st.markdown(match['highlighted_resume'], unsafe_allow_html=True)
-                                
-                                st.markdown("<br>", unsafe_allow_html=True)
-                                st.markdown("---")
-                                st.markdown("<br>", unsafe_allow_html=True)
-                else:
-                    with st.expander(f"#{rank}: {result['resume_name']} - ❌ No good matches found"):
-                        st.warning("This resume doesn't match any job requirements well.")
+            # Kept across reruns so paging, sorting and opening a resume never re-run the matching
+            st.session_state['match_run'] = {
+                'results': results,
+                'score_table': score_table,
+                'stats': match_service.stats(),
+            }
+    
+    match_run = st.session_state.get('match_run')
+    if match_run is not None:
+        show_results(match_run)
+    if run is not None:
+        show_timings(run, match_service)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
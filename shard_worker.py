@@ -0,0 +1,46 @@
+"""Worker process holding one shard of a sharded job database (see sharding).
+
+Kept apart from sharding so a spawned worker only imports faiss and
+index_factory, not the embedding model or LangChain.
+"""
+import os
+import numpy as np
+from index_factory import apply_search_params, filtered_search_params, load_config, read_index
+
+def open_shard(path):
+    """(index, config) of one shard, with index None if the shard holds no chunks."""
+    config = load_config(path)
+    if not os.path.exists(os.path.join(path, "index.faiss")):
+        return None, config
+    return read_index(path, config, mmap=True), config
+
+def search_shard(index, config, vectors, k, nprobe=None, ef_search=None, bitmap=None):
+    """Search one shard, optionally only the local rows set in bitmap; rows without a hit are -1."""
+    if index is None or (bitmap is not None and not bitmap.any()):
+        return np.full((len(vectors), k), np.finfo(np.float32).max, dtype=np.float32), np.full((len(vectors), k), -1)
+    apply_search_params(index, config, nprobe, ef_search)
+    params = filtered_search_params(index, bitmap) if bitmap is not None else None
+    return index.search(vectors, k, params=params)
+
+def run(path, connection, threads):
+    # Each worker gets its share of the cores instead of every shard's OpenMP pool claiming all of them
+    if threads:
+        import faiss
+        faiss.omp_set_num_threads(threads)
+    try:
+        index, config = open_shard(path)
+    except Exception as e:
+        connection.send(("error", f"{path}: {e}"))
+        return
+    connection.send(("ready", index.ntotal if index is not None else 0))
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        try:
+            connection.send(("ok", search_shard(index, config, *request)))
+        except Exception as e:
+            connection.send(("error", f"{path}: {e}"))
@@ -0,0 +1,391 @@
+"""Split the job database into shards searched in parallel by worker processes.
+
+A sharded database keeps N complete job databases in shard_000/, shard_001/,
+... next to shards.json and index_config.json; every job lives in the shard
+picked by a hash of its job_id. For searching, each shard is held by its own
+worker process (see shard_worker) and ShardedIndex fans every query out to all
+of them and merges their top-k, so a sharded database is searched through the
+same LangChain FAISS vectorstore, match records and scoring as an unsharded one.
+
+    python ingest.py --db job_database --jobs ./job_descriptions --rebuild flat --shards 4
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections.abc import Mapping
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+import metrics
+import shard_worker
+from chunk_store import CHUNKS_NAME, RowIdMap, SQLiteDocstore
+from features import FEATURES_NAME, FeatureTable
+from index_factory import DEFAULT_CONFIG, apply_search_params, load_config, save_config
+from job_store import (LEGACY_DOCSTORE_NAME, MANIFEST_NAME, SHARD_DIR, SHARDS_NAME, JobDatabase,
+                       check_job_database, finish_save, open_job_vectorstore, read_shard_count, remove_shards)
+from lexical_index import LEXICAL_NAME, Bm25Index
+
+def shard_of(job_id, n_shards):
+    # Stable across processes and Python versions, unlike hash()
+    return int.from_bytes(hashlib.sha1(job_id.encode("utf-8")).digest()[:8], "big") % n_shards
+
+def shard_paths(path, n_shards):
+    return [os.path.join(path, SHARD_DIR.format(shard)) for shard in range(n_shards)]
+
+class ShardedJobDatabase:
+    """A job database split into JobDatabase shards by job_id, with the same interface as JobDatabase."""
+
+    def __init__(self, path, embeddings, shards, index_config=None):
+        self.path = path
+        self.embeddings = embeddings
+        self.shards = shards
+        self.index_config = index_config if index_config is not None else dict(DEFAULT_CONFIG)
+
+    @classmethod
+    def load(cls, path, embeddings):
+        n_shards = read_shard_count(path)
+        with metrics.timer("index_load") as timing:
+            shards = [JobDatabase._load(shard_path, embeddings) for shard_path in shard_paths(path, n_shards)]
+            db = cls(path, embeddings, shards, load_config(path))
+            timing['items'] = db.chunk_count
+        return db
+
+    @classmethod
+    def create(cls, path, embeddings, n_shards, index_config=None):
+        """An empty database with n_shards shards; nothing is written until save()."""
+        index_config = index_config if index_config is not None else load_config(path)
+        shards = [JobDatabase(shard_path, embeddings, index_config=dict(index_config))
+                  for shard_path in shard_paths(path, n_shards)]
+        return cls(path, embeddings, shards, index_config)
+
+    @property
+    def n_shards(self):
+        return len(self.shards)
+
+    @property
+    def jobs(self):
+        return {job_id: job for shard in self.shards for job_id, job in shard.jobs.items()}
+
+    def __contains__(self, job_id):
+        return job_id in self._shard_for(job_id)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    @property
+    def chunk_count(self):
+        return sum(shard.chunk_count for shard in self.shards)
+
+    def _shard_for(self, job_id):
+        return self.shards[shard_of(job_id, len(self.shards))]
+
+    def stored_status(self, job_id, data_hash):
+        """Same as JobDatabase.stored_status, checking for duplicates in every shard."""
+        status = self._shard_for(job_id).stored_status(job_id, data_hash)
+        if status is None and any(shard.stored_status(job_id, data_hash) for shard in self.shards):
+            return "duplicate"
+        return status
+
+    def add_job(self, job_id, filename, data_hash, chunks):
+        return self.add_jobs([(job_id, filename, data_hash, chunks)])[0]
+
+    def add_jobs(self, new_jobs):
+        """Route (job_id, filename, data_hash, chunks) tuples to their shards; statuses as JobDatabase.add_jobs."""
+        statuses = [None] * len(new_jobs)
+        routed = [[] for _ in self.shards]
+        positions = [[] for _ in self.shards]
+        # A shard only sees its own jobs, so repeats of one upload across shards are caught here
+        first_job = {}
+        for position, new_job in enumerate(new_jobs):
+            job_id, _, data_hash, _ = new_job
+            status = self.stored_status(job_id, data_hash)
+            if status is None and first_job.setdefault(data_hash, job_id) != job_id:
+                status = "duplicate"
+            if status is not None:
+                statuses[position] = status
+                continue
+            shard = shard_of(job_id, len(self.shards))
+            routed[shard].append(new_job)
+            positions[shard].append(position)
+        for shard, shard_jobs, shard_positions in zip(self.shards, routed, positions):
+            if shard_jobs:
+                for position, status in zip(shard_positions, shard.add_jobs(shard_jobs)):
+                    statuses[position] = status
+        return statuses
+
+    def delete_job(self, job_id):
+        self._shard_for(job_id).delete_job(job_id)
+
+    def rebuild(self, index_config=None):
+        if index_config is not None:
+            self.index_config = index_config
+        for shard in self.shards:
+            shard.rebuild(index_config)
+
+    def clear(self, index_config=None):
+        if index_config is not None:
+            self.index_config = index_config
+        for shard in self.shards:
+            shard.clear(index_config)
+
+    def save(self):
+        with metrics.timer("index_save", items=self.chunk_count):
+            os.makedirs(self.path, exist_ok=True)
+            for shard in self.shards:
+                shard._save()
+            save_config(self.path, self.index_config)
+            # Readers switch to the shards once shards.json exists, so it goes after them
+            with open(os.path.join(self.path, SHARDS_NAME + ".tmp"), "w", encoding="utf-8") as f:
+                json.dump({'shards': len(self.shards)}, f)
+            os.replace(os.path.join(self.path, SHARDS_NAME + ".tmp"), os.path.join(self.path, SHARDS_NAME))
+            # Left over from an unsharded layout, or from a layout with more shards
+            for name in ("index.faiss", LEXICAL_NAME, FEATURES_NAME, CHUNKS_NAME, LEGACY_DOCSTORE_NAME, MANIFEST_NAME):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+            remove_shards(self.path, keep=len(self.shards))
+
+def load_job_database(path, embeddings, shards=None):
+    """Open the job database at path for writing, sharded or not.
+
+    With shards, the database returned has that many shards (1 meaning
+    unsharded): the stored one if it already does, otherwise an empty one
+    with the stored index config, to be filled by a rebuild.
+    """
+    stored = read_shard_count(path) or 1
+    if shards is None or shards == stored:
+        if read_shard_count(path) is not None:
+            return ShardedJobDatabase.load(path, embeddings)
+        return JobDatabase.load(path, embeddings)
+    if shards == 1:
+        return JobDatabase(path, embeddings, index_config=load_config(path))
+    return ShardedJobDatabase.create(path, embeddings, shards)
+
+class _ShardProcess:
+    # One worker process per shard, driven over a pipe: requests are sent to every
+    # shard before any result is read, so the shards search concurrently
+    def __init__(self, path, threads):
+        self.path = path
+        context = multiprocessing.get_context("spawn")
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=shard_worker.run, args=(path, child, threads),
+                                        name=f"shard-{os.path.basename(path)}", daemon=True)
+        self._process.start()
+        child.close()
+
+    def ready(self):
+        return self.result()
+
+    def request(self, message):
+        self._connection.send(message)
+
+    def result(self):
+        try:
+            status, value = self._connection.recv()
+        except EOFError:
+            raise RuntimeError(f"Shard worker for {self.path} exited") from None
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def close(self):
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._connection.close()
+
+class _LocalShard:
+    # Same protocol as _ShardProcess inside the calling process, for debugging and single-core hosts
+    def __init__(self, path, threads):
+        self.path = path
+        self._index, self._config = shard_worker.open_shard(path)
+        self._result = None
+
+    def ready(self):
+        return self._index.ntotal if self._index is not None else 0
+
+    def request(self, message):
+        self._result = shard_worker.search_shard(self._index, self._config, *message)
+
+    def result(self):
+        result, self._result = self._result, None
+        return result
+
+    def close(self):
+        self._index = None
+
+class ShardedIndex:
+    """Stand-in for a FAISS index that scatters every search to the shards and merges their top-k.
+
+    Rows are numbered shard by shard, so global row = shard offset + the
+    shard's own row. A bitmap from index_factory.filtered_search_params is
+    split per shard, and shards it excludes entirely are not asked at all.
+    Searches are serialized; each one runs on all shards at once.
+    """
+
+    def __init__(self, paths, processes=True, threads=None):
+        shard_class = _ShardProcess if processes else _LocalShard
+        self._shards = []
+        try:
+            for path in paths:
+                self._shards.append(shard_class(path, threads))
+            sizes = [shard.ready() for shard in self._shards]
+        except Exception:
+            self.close()
+            raise
+        self.offsets = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+        self.ntotal = int(self.offsets[-1])
+        self.nprobe = self.ef_search = None
+        self._lock = threading.Lock()
+
+    def set_search_params(self, config, nprobe=None, ef_search=None):
+        # Passed along with every query; each worker falls back to its recorded config
+        self.nprobe, self.ef_search = nprobe, ef_search
+
+    def search(self, x, k, params=None):
+        bitmap = getattr(params, "bitmap", None)
+        mask = None if bitmap is None else np.unpackbits(bitmap, count=self.ntotal, bitorder="little").astype(bool)
+        with self._lock:
+            asked = []
+            for shard, start, end in zip(self._shards, self.offsets[:-1], self.offsets[1:]):
+                if start == end:
+                    continue
+                local = None if mask is None else np.packbits(mask[start:end], bitorder="little")
+                if local is not None and not local.any():
+                    continue
+                try:
+                    shard.request((x, k, self.nprobe, self.ef_search, local))
+                except Exception:
+                    self._collect(asked)
+                    raise
+                asked.append((shard, start))
+            results = self._collect(asked)
+
+        if not results:
+            return np.full((len(x), k), np.finfo(np.float32).max, dtype=np.float32), np.full((len(x), k), -1)
+        distances = np.concatenate([shard_distances for (shard_distances, _), _ in results], axis=1)
+        indices = np.concatenate([np.where(shard_indices >= 0, shard_indices + start, -1)
+                                  for (_, shard_indices), start in results], axis=1)
+        # Same order a single index would return: nearest first, misses (-1) last
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+    def _collect(self, asked):
+        # Read every asked shard's reply before raising the first error, so no
+        # reply is left in a pipe to be taken for the next query's result
+        results = []
+        error = None
+        for shard, start in asked:
+            try:
+                results.append((shard.result(), start))
+            except Exception as exc:
+                error = error or exc
+        if error is not None:
+            raise error
+        return results
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
+
+class ShardedDocstore(Docstore):
+    """Read-only docstore over every shard's chunks.sqlite; docstore ids are "<shard>:<chunk id>"."""
+
+    def __init__(self, paths):
+        self._docstores = [SQLiteDocstore(path) if os.path.exists(os.path.join(path, CHUNKS_NAME)) else None
+                           for path in paths]
+        self._row_job_index = None
+
+    def search(self, search):
+        shard, doc_id = search.split(":", 1)
+        return self._docstores[int(shard)].search(doc_id)
+
+    def row_job_index(self):
+        """(job_ids, row_to_job) over the global rows of ShardedIndex."""
+        if self._row_job_index is None:
+            job_ids, row_to_job = [], []
+            for docstore in self._docstores:
+                if docstore is None:
+                    continue
+                shard_job_ids, shard_row_to_job = docstore.row_job_index()
+                row_to_job.append(shard_row_to_job + len(job_ids))
+                job_ids.extend(shard_job_ids)
+            self._row_job_index = (job_ids, np.concatenate(row_to_job) if row_to_job else np.empty(0, dtype=np.int64))
+        return self._row_job_index
+
+class ShardedRowIdMap(Mapping):
+    """Global row -> "<shard>:<chunk id>", matching ShardedIndex and ShardedDocstore."""
+
+    def __init__(self, paths, offsets):
+        self._row_maps = [RowIdMap(path) for path in paths]
+        self.offsets = offsets
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.offsets[-1]:
+            raise KeyError(row)
+        shard = int(np.searchsorted(self.offsets, row, side="right")) - 1
+        return f"{shard}:{self._row_maps[shard][int(row - self.offsets[shard])]}"
+
+    def __iter__(self):
+        return iter(range(int(self.offsets[-1])))
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+def _concat_feature_tables(tables):
+    tables = [table for table in tables if table is not None]
+    if not tables:
+        return None
+    return FeatureTable(
+        [job_id for table in tables for job_id in table.job_ids],
+        np.concatenate([table.skill_bits for table in tables]),
+        np.concatenate([table.min_years for table in tables]),
+        np.concatenate([table.max_years for table in tables]),
+        np.concatenate([table.section_bits for table in tables]),
+    )
+
+def check_search_database(path):
+    """Raise FileNotFoundError unless open_search_database will find a job database at path.
+
+    Cheap, so callers can check before loading the embedding model.
+    """
+    n_shards = read_shard_count(path)
+    if n_shards is None:
+        check_job_database(path)
+    elif not any(os.path.exists(os.path.join(shard_path, CHUNKS_NAME)) for shard_path in shard_paths(path, n_shards)):
+        raise FileNotFoundError(f"No job database found in {path}")
+
+def open_search_database(path, embeddings, nprobe=None, ef_search=None, processes=True, threads=None):
+    """Open any job database read-only for searching: (vectorstore, Bm25Index or None, FeatureTable or None).
+
+    An unsharded database opens as with job_store.open_job_vectorstore. A
+    sharded one gets a worker process per shard (processes=False searches
+    them in this process instead), each with threads FAISS threads, by
+    default an even split of the cores. Call vectorstore.index.close() to
+    stop the workers when done; they also exit with this process.
+    """
+    n_shards = read_shard_count(path)
+    if n_shards is None:
+        vectorstore = open_job_vectorstore(path, embeddings, nprobe, ef_search)
+        return vectorstore, Bm25Index.load(path, vectorstore.index.ntotal), FeatureTable.load(path)
+    paths = shard_paths(path, n_shards)
+    for shard_path in paths:
+        finish_save(shard_path)
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // n_shards)
+    with metrics.timer("index_open"):
+        index = ShardedIndex(paths, processes, threads)
+        if index.ntotal == 0:
+            index.close()
+            raise FileNotFoundError(f"No job database found in {path}")
+        apply_search_params(index, load_config(path), nprobe, ef_search)
+        vectorstore = FAISS(embeddings, index, ShardedDocstore(paths), ShardedRowIdMap(paths, index.offsets))
+    # BM25 over all shards at once, so term statistics and scores match an unsharded database
+    lexical = Bm25Index.load_concatenated(paths, np.diff(index.offsets))
+    return vectorstore, lexical, _concat_feature_tables(FeatureTable.load(shard_path) for shard_path in paths)
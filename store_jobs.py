@@ -1,93 +1,142 @@
 import streamlit as st
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from tempfile import NamedTemporaryFile
+import metrics
+from embedding_model import load_embedding_model
+from ingest import iter_ingest, read_checkpoint
+from job_store import database_fingerprint
+from sharding import load_job_database
+from index_factory import INDEX_TYPES, make_config
 
 # Set up the page
 st.set_page_config(page_title="Job Description Storage", layout="wide")
 st.title("💼 Store Job Descriptions")
 st.markdown("Upload job descriptions to create a searchable database")
 
-# Initialize the embedding model
-@st.cache_resource
-def load_embedding_model():
-    model_name = "sentence-transformers/all-MiniLM-L6-v2"
-    return HuggingFaceEmbeddings(model_name=model_name)
+# Prometheus/JSON stats on METRICS_PORT, if set
+metrics.serve_metrics_from_env()
 
+INDEX_TYPE_LABELS = {
+    'flat': "Flat (exact search)",
+    'ivf': "IVF (clustered, trained centroids)",
+    'hnsw': "HNSW (graph)",
+    'ivfpq': "IVF-PQ (compressed, lowest memory)"
+}
+
+# Initialize the embedding model (loaded once per process)
 embeddings = load_embedding_model()
 
-# Function to process PDF and extract text
-def extract_text_from_pdf(pdf_file):
-    try:
-        with NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_file.getvalue())
-            tmp_file_path = tmp_file.name
-        
-        loader = PyPDFLoader(tmp_file_path)
-        documents = loader.load()
-        os.unlink(tmp_file_path)
-        
-        full_text = " ".join([doc.page_content for doc in documents])
-        return full_text
-    except Exception as e:
-        st.error(f"Error processing {pdf_file.name}: {str(e)}")
-        return None
+# Loaded once per saved version of the database rather than on every rerun
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_job_database(fingerprint):
+    return load_job_database("job_database", embeddings)
+
+# Where the time went in the last run
+def show_timings(run):
+    with st.expander("⏱️ Timings"):
+        snapshot = run.snapshot()
+        st.table(metrics.summary_rows(snapshot))
+        if snapshot['documents']:
+            st.markdown("**Per document**")
+            st.dataframe(snapshot['documents'])
+        peak_rss = metrics.peak_rss_bytes()
+        if peak_rss is not None:
+            st.caption(f"Peak memory of this process: {peak_rss / 2 ** 20:.0f} MB")
 
 def main():
     # Create database directory if it doesn't exist
     os.makedirs("job_database", exist_ok=True)
+    job_db = get_job_database(database_fingerprint("job_database"))
     
     st.subheader("📋 Upload Job Descriptions")
     job_desc_files = st.file_uploader("Upload Job Description PDFs", type='pdf', accept_multiple_files=True)
+    mode = st.radio(
+        "Storage mode",
+        ["Add to existing database", "Rebuild database from scratch"],
+        help="Adding only embeds new or edited job descriptions; unchanged ones are skipped."
+    )
+    if mode == "Rebuild database from scratch":
+        index_type = st.selectbox(
+            "Index type",
+            INDEX_TYPES,
+            index=INDEX_TYPES.index(job_db.index_config['type']),
+            format_func=lambda index_type: INDEX_TYPE_LABELS[index_type]
+        )
+        shards = st.number_input(
+            "Shards",
+            min_value=1,
+            max_value=64,
+            value=getattr(job_db, "n_shards", 1),
+            help="Split the database by job so each part is searched by its own process. 1 keeps a single index."
+        )
+    
+    # Left behind by an upload that stopped before it finished
+    checkpoint = read_checkpoint("job_database")
+    if checkpoint is not None:
+        st.warning(f"⚠️ An earlier upload was interrupted after storing {len(checkpoint['stored'])} job descriptions. "
+                   f"Upload the same files again to resume; stored ones are skipped.")
     
     if job_desc_files and st.button("Store Job Descriptions"):
-        with st.spinner("Processing and storing job descriptions..."):
-            all_chunks = []
-            all_metadatas = []
+        with st.spinner("Processing and storing job descriptions..."), metrics.capture() as run, metrics.profiled("store_jobs"):
+            index_config = None
+            if mode == "Rebuild database from scratch":
+                index_config = make_config(index_type)
+                job_db = load_job_database("job_database", embeddings, int(shards))
             
-            for job_file in job_desc_files:
-                job_text = extract_text_from_pdf(job_file)
-                if job_text:
-                    # Split job description into chunks
-                    text_splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=300, 
-                        chunk_overlap=100
-                    )
-                    chunks = text_splitter.split_text(job_text)
-                    
-                    # Create metadata for each chunk
-                    job_id = os.path.splitext(job_file.name)[0]  # Use filename as ID
-                    metadatas = [{'job_id': job_id, 'filename': job_file.name}] * len(chunks)
-                    
-                    all_chunks.extend(chunks)
-                    all_metadatas.extend(metadatas)
-                    
-                    st.success(f"Processed: {job_file.name} → {len(chunks)} chunks")
+            # Extract, split, embed and append a batch at a time, logging a checkpoint every few thousand chunks.
+            # Content that is already stored is skipped before extraction.
+            new_jobs = []
+            progress = st.empty()
+            uploads = ((job_file.name, job_file.getvalue()) for job_file in job_desc_files)
+            try:
+                for event in iter_ingest(job_db, uploads, index_config):
+                    if event['event'] == "skipped":
+                        st.info(f"Skipped: {event['filename']} ({event['status']})")
+                    elif event['event'] == "error":
+                        st.error(f"Error processing {event['filename']}: {event['error']}")
+                    elif event['event'] == "resumed":
+                        st.info(f"Resuming the interrupted upload ({event['jobs']} job descriptions already stored)")
+                    elif event['event'] == "split":
+                        new_jobs.append(event['filename'])
+                        st.success(f"Processed: {event['filename']} → {event['chunks']} chunks")
+                    elif event['event'] == "checkpoint":
+                        progress.caption(f"Checkpoint saved: {event['chunks']} chunks from {event['jobs']} job descriptions")
+                    elif event['event'] == "done":
+                        done = event
+            except BaseException:
+                # The cached database may hold changes that were never saved
+                get_job_database.clear()
+                raise
             
-            if all_chunks:
-                # Create FAISS vectorstore
-                vectorstore = FAISS.from_texts(
-                    texts=all_chunks,
-                    embedding=embeddings,
-                    metadatas=all_metadatas
-                )
-                
-                # Save the database to disk
-                vectorstore.save_local("job_database")
-                
-                st.success(f"✅ Database created successfully!")
-                st.info(f"Stored {len(all_chunks)} chunks from {len(job_desc_files)} job descriptions")
+            if done['jobs']:
+                st.success(f"✅ Database updated successfully!")
+                st.info(f"Stored {done['chunks']} new chunks from {done['jobs']} job descriptions, {done['replaced']} replaced "
+                        f"({job_db.chunk_count} chunks from {len(job_db)} job descriptions in total)")
                 st.info("Database saved in: job_database/ folder")
+                st.caption(f"Embedding cache: {embeddings.hits} hits, {embeddings.misses} misses")
                 
                 # Show what's stored
                 st.subheader("📊 Stored Job Descriptions")
-                for job_file in job_desc_files:
-                    st.write(f"• {job_file.name}")
-            else:
+                for filename in new_jobs:
+                    st.write(f"• {filename}")
+            elif mode == "Rebuild database from scratch" and not len(job_db):
                 st.error("No text could be extracted from the files")
+            else:
+                st.info("No new job descriptions to store")
+        
+        show_timings(run)
+    
+    if len(job_db):
+        st.subheader("🗑️ Remove Job Descriptions")
+        to_delete = st.multiselect("Job descriptions in the database", sorted(job_db.jobs))
+        if to_delete and st.button("Delete Selected"):
+            try:
+                for job_id in to_delete:
+                    job_db.delete_job(job_id)
+                job_db.save()
+            except BaseException:
+                get_job_database.clear()
+                raise
+            st.success(f"Deleted {len(to_delete)} job descriptions")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from highlighting import highlight_matching_words
+
+def test_marks_do_not_cross_existing_bold():
+    highlighted, _, _, phrases = highlight_matching_words(
+        "Senior **Python Django** **developer** wanted here",
+        "we need a python django developer wanted"
+    )
+
+    assert highlighted == ("Senior **<mark>Python Django</mark>** **<mark>developer</mark>** "
+                           "<mark>**wanted**</mark> here")
+    # Every <mark> holds balanced bold markers
+    for inside in re.findall(r"<mark>(.*?)</mark>", highlighted):
+        assert inside.count("**") % 2 == 0
+    assert phrases == ["Python Django developer wanted"]
+
+def test_plain_text_is_marked_as_one_span():
+    highlighted, _, _, phrases = highlight_matching_words(
+        "plain python django developer text", "python django developer"
+    )
+
+    assert highlighted == "plain <mark>**python** **django** **developer**</mark> text"
+    assert phrases == ["python django developer"]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("faiss")
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from job_store import JobDatabase
+
+FIRST = ["Python developer with Django experience", "Builds REST APIs"]
+SECOND = ["Java engineer for payment systems", "Spring Boot and Kafka", "Five years of experience"]
+
+def chunk_texts(db, job_id):
+    return [db.vectorstore.docstore.search(doc_id).page_content for doc_id in db.jobs[job_id]['ids']]
+
+def test_same_job_twice_in_one_batch_on_an_empty_database(tmp_path):
+    db = JobDatabase.load(str(tmp_path), DeterministicFakeEmbedding(size=16))
+
+    statuses = db.add_jobs([("JD", "JD.pdf", "a", FIRST), ("JD", "JD.pdf", "b", SECOND)])
+
+    assert statuses == ["superseded", "added"]
+    assert db.jobs["JD"]['content_hash'] == "b"
+    assert chunk_texts(db, "JD") == SECOND
+    assert db.chunk_count == len(SECOND)
+
+def test_same_job_twice_in_one_batch_replaces_the_stored_one(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    db = JobDatabase.load(str(tmp_path), embeddings)
+    db.add_jobs([("JD", "JD.pdf", "old", ["Old posting text"]), ("Other", "Other.pdf", "o", ["Data analyst role"])])
+    db.save()
+
+    db = JobDatabase.load(str(tmp_path), embeddings)
+    statuses = db.add_jobs([("JD", "JD.pdf", "a", FIRST), ("JD", "JD.pdf", "b", SECOND)])
+
+    assert statuses == ["superseded", "replaced"]
+    assert chunk_texts(db, "JD") == SECOND
+    assert db.chunk_count == len(SECOND) + 1
+    db.save()
+    assert chunk_texts(JobDatabase.load(str(tmp_path), embeddings), "JD") == SECOND
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("faiss")
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from resume_matcher import ResumeMatcher
+
+WORDS = ["python", "java", "sql"]
+
+class KeywordEmbeddings(Embeddings):
+    """Word counts over WORDS, so similarities follow the words a text repeats."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.array([text.lower().split().count(word) for word in WORDS], dtype=np.float32) + 0.1
+        return (vector / np.linalg.norm(vector)).tolist()
+
+class FixedLexicalIndex:
+    """Stands in for Bm25Index with one fixed row of job scores per resume."""
+
+    def __init__(self, scores):
+        self.scores = np.asarray(scores, dtype=np.float64)
+
+    def score_jobs(self, texts, row_to_job, n_jobs):
+        return self.scores[:len(texts), :n_jobs].copy()
+
+def job_vectorstore(job_texts):
+    return FAISS.from_texts(
+        list(job_texts.values()), KeywordEmbeddings(),
+        metadatas=[{'job_id': job_id, 'filename': f"{job_id}.pdf"} for job_id in job_texts]
+    )
+
+RESUMES = {
+    "strong.pdf": "python python python developer",
+    "partial.pdf": "python java sql developer",
+    "weak.pdf": "java java sql developer",
+}
+
+def match(job_texts, lexical_scores=None, lexical_weight=0.0):
+    lexical_index = None if lexical_scores is None else FixedLexicalIndex(lexical_scores)
+    matcher = ResumeMatcher(job_vectorstore(job_texts), KeywordEmbeddings(), lexical_index=lexical_index,
+                            lexical_weight=lexical_weight, highlight=False)
+    return matcher.match_texts(list(RESUMES), list(RESUMES.values()))
+
+def test_candidates_per_job_follow_similarity_with_keyword_weight():
+    job_texts = {"python-dev": "python python engineer", "java-dev": "java java engineer"}
+    # Keyword scores that favour the java job for every resume
+    lexical_scores = [[1.0, 5.0]] * len(RESUMES)
+    _, similarity_table = match(job_texts)
+    _, fused_table = match(job_texts, lexical_scores, lexical_weight=0.3)
+
+    np.testing.assert_allclose(fused_table.scores, similarity_table.scores)
+    candidates = fused_table.ranked_candidates()["python-dev"]
+    assert [name for name, _ in candidates] == ["strong.pdf", "partial.pdf", "weak.pdf"]
+    assert [score for _, score in candidates] == sorted((score for _, score in candidates), reverse=True)
+
+def test_keyword_weight_orders_best_jobs_but_keeps_similarity_scores():
+    job_texts = {"python-dev": "python python engineer", "java-dev": "java java engineer"}
+    lexical_scores = [[1.0, 5.0]] * len(RESUMES)
+    results, table = match(job_texts, lexical_scores, lexical_weight=0.9)
+
+    strong = results[0]
+    assert [job_id for job_id, _ in strong['best_jobs']] == ["java-dev", "python-dev"]
+    assert dict(strong['best_jobs']) == dict(table.jobs_for_resume(0))
+
+def test_single_job_scores_are_not_flattened_by_fusion():
+    results, table = match({"python-dev": "python python engineer"}, [[1.0]] * len(RESUMES), lexical_weight=0.3)
+
+    scores = [result['best_jobs'][0][1] for result in results]
+    assert scores[0] > scores[1] > scores[2]
+    assert all(score < 1.0 for score in scores)
+
+def test_job_found_only_by_keywords_is_listed_in_best_jobs():
+    # Three python jobs fill the vector search's matches per chunk, so only BM25 finds the java job
+    job_texts = {
+        "python-dev": "python python engineer",
+        "python-lead": "python lead",
+        "python-data": "python sql data",
+        "java-dev": "java java engineer",
+    }
+    results, table = match(job_texts, [[0.0, 0.0, 0.0, 5.0]] * len(RESUMES), lexical_weight=0.6)
+
+    strong = dict(results[0]['best_jobs'])
+    assert list(strong)[0] == "java-dev"
+    assert strong["java-dev"] == 0.0
+    assert "java-dev" not in dict(table.jobs_for_resume(0))